@@ -0,0 +1,241 @@
+"""
+Benchmark harness for roo-conf.
+
+Builds synthetic Roo globalStorage trees and template repositories, times
+deploy_prompts, extract_conversations_command, convert_to_markdown and
+list_available_prompts, and reports throughput and peak RSS as JSON.
+Each benchmark runs in a fresh interpreter with HOME pointing at the
+fixture, so peak RSS is per benchmark and no real configuration is touched.
+
+    python benchmarks/bench.py --tasks 500 --messages 100 --output results.json
+    python benchmarks/bench.py --save-baseline
+    python benchmarks/bench.py --baseline benchmarks/baseline.json --tolerance 0.25
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import contextlib
+import subprocess
+import statistics
+import pathlib
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent))
+import fixtures
+
+BENCHMARKS_DIR = pathlib.Path(__file__).resolve().parent
+SRC_DIR = BENCHMARKS_DIR.parent / "src"
+DEFAULT_BASELINE = BENCHMARKS_DIR / "baseline.json"
+
+
+def _peak_rss_kb():
+    try:
+        import resource
+    except ImportError:
+        return None # Not available on Windows
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+# Benchmark bodies. Each runs inside a child process and returns
+# (items processed, seconds) so fixture setup is not timed.
+
+def _bench_deploy_prompts(fixture_dir, params):
+    from roo_conf.deploy import deploy_prompts
+    # A fresh target per run, so every run writes all files
+    os.chdir(tempfile.mkdtemp(prefix="deploy-target-", dir=fixture_dir))
+    start = time.perf_counter()
+    deploy_prompts(argparse.Namespace(components=[], dry_run=False, repos=None, jobs=None))
+    return params["template_files"], time.perf_counter() - start
+
+
+def _bench_extract_conversations(fixture_dir, params):
+    from roo_conf import extract_conversations_command
+    args = argparse.Namespace(target_repo_path=str(fixture_dir / "workspace"), jobs=params["jobs"], force=True, format="markdown", output=None, repos=None, all_workspaces=False, store=False)
+    start = time.perf_counter()
+    extract_conversations_command(args)
+    return params["tasks"], time.perf_counter() - start
+
+
+def _bench_convert_to_markdown(fixture_dir, params):
+    from roo_conf import convert_to_markdown
+    api_history, ui_messages = fixtures.make_messages(params["convert_messages"], params["content_size"])
+    start = time.perf_counter()
+    convert_to_markdown(api_history, ui_messages)
+    return params["convert_messages"], time.perf_counter() - start
+
+
+def _bench_list_available_prompts(fixture_dir, params):
+    from roo_conf.deploy import list_available_prompts
+    start = time.perf_counter()
+    list_available_prompts(argparse.Namespace())
+    return params["template_files"], time.perf_counter() - start
+
+
+BENCHMARKS = {
+    "deploy_prompts": _bench_deploy_prompts,
+    "extract_conversations_command": _bench_extract_conversations,
+    "convert_to_markdown": _bench_convert_to_markdown,
+    "list_available_prompts": _bench_list_available_prompts,
+}
+
+
+def run_child(name, fixture_dir, params):
+    """Runs one benchmark in this process and prints its measurement as JSON."""
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+        items, seconds = BENCHMARKS[name](pathlib.Path(fixture_dir), params)
+    print(json.dumps({"items": items, "seconds": seconds, "peak_rss_kb": _peak_rss_kb()}))
+
+
+def build_fixture(fixture_dir, params):
+    """Creates the fake home directory, workspace and template repository."""
+    home_dir = fixture_dir / "home"
+    workspace = fixture_dir / "workspace"
+    workspace.mkdir(parents=True)
+    fixtures.make_roo_storage(
+        home_dir, workspace.resolve(), params["tasks"], params["messages"],
+        content_size=params["content_size"], state_padding=params["state_size_kb"] * 1024,
+        other_workspaces=params["other_tasks"],
+    )
+    config_dir = home_dir / ".config" / "roo-conf"
+    fixtures.make_template_repo(config_dir / "templates", params["template_files"], file_size=params["template_file_size"])
+    (config_dir / "config.json").write_text(json.dumps({"template_source_repo": "https://example.invalid/templates.git"}))
+
+
+def measure(name, fixture_dir, params, repeat):
+    """Runs a benchmark repeat times in fresh interpreters and summarises the runs."""
+    env = dict(os.environ)
+    env["HOME"] = str(fixture_dir / "home")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(SRC_DIR), env.get("PYTHONPATH")]))
+
+    runs = []
+    for _ in range(repeat):
+        completed = subprocess.run(
+            [sys.executable, __file__, "--child", name, "--fixture", str(fixture_dir), "--params", json.dumps(params)],
+            env=env, capture_output=True, text=True, check=True,
+        )
+        runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+    seconds = [run["seconds"] for run in runs]
+    best = min(seconds)
+    peaks = [run["peak_rss_kb"] for run in runs if run["peak_rss_kb"] is not None]
+    return {
+        "items": runs[0]["items"],
+        "seconds": best,
+        "median_seconds": statistics.median(seconds),
+        "throughput_per_second": runs[0]["items"] / best if best > 0 else None,
+        "peak_rss_kb": max(peaks) if peaks else None,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compares results with a baseline report. Returns a dict of per-benchmark
+    time ratios and the names of benchmarks slower than 1 + tolerance.
+    """
+    ratios = {}
+    regressions = []
+    for name, result in results["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base or not base.get("seconds"):
+            continue
+        ratio = result["seconds"] / base["seconds"]
+        ratios[name] = ratio
+        if ratio > 1 + tolerance:
+            regressions.append(name)
+    return ratios, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark roo-conf against synthetic Roo storage fixtures.")
+    parser.add_argument("--tasks", type=int, default=200, help="Tasks belonging to the benchmarked workspace.")
+    parser.add_argument("--other-tasks", type=int, default=200, help="Tasks belonging to other workspaces.")
+    parser.add_argument("--messages", type=int, default=50, help="Messages per task.")
+    parser.add_argument("--content-size", type=int, default=400, help="Approximate characters per message.")
+    parser.add_argument("--state-size-kb", type=int, default=10 * 1024, help="Size of unrelated data in the global state file.")
+    parser.add_argument("--convert-messages", type=int, default=20000, help="Messages in the convert_to_markdown benchmark.")
+    parser.add_argument("--template-files", type=int, default=500, help="Files in the synthetic template repository.")
+    parser.add_argument("--template-file-size", type=int, default=2000, help="Approximate bytes per template file.")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Worker processes for extract-conversations.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per benchmark; the fastest is reported.")
+    parser.add_argument("--only", nargs="*", choices=sorted(BENCHMARKS), help="Benchmarks to run (default: all).")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout.")
+    parser.add_argument("--baseline", help=f"Compare against this report (default: {DEFAULT_BASELINE} if it exists).")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this report as the baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown against the baseline before failing.")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--fixture", help=argparse.SUPPRESS)
+    parser.add_argument("--params", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.fixture, json.loads(args.params))
+        return 0
+
+    params = {
+        "tasks": args.tasks,
+        "other_tasks": args.other_tasks,
+        "messages": args.messages,
+        "content_size": args.content_size,
+        "state_size_kb": args.state_size_kb,
+        "convert_messages": args.convert_messages,
+        "template_files": args.template_files,
+        "template_file_size": args.template_file_size,
+        "jobs": args.jobs,
+    }
+
+    fixture_dir = pathlib.Path(tempfile.mkdtemp(prefix="roo-conf-bench-"))
+    try:
+        print(f"Building fixtures in {fixture_dir}", file=sys.stderr)
+        build_fixture(fixture_dir, params)
+        results = {}
+        for name in args.only or BENCHMARKS:
+            print(f"Running {name}...", file=sys.stderr)
+            results[name] = measure(name, fixture_dir, params, args.repeat)
+    finally:
+        shutil.rmtree(fixture_dir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "params": params,
+        },
+        "results": results,
+    }
+
+    exit_code = 0
+    baseline_path = pathlib.Path(args.baseline) if args.baseline else DEFAULT_BASELINE
+    if baseline_path.exists() and not args.save_baseline:
+        baseline = json.loads(baseline_path.read_text())
+        if baseline.get("meta", {}).get("params") != params:
+            print("Warning: Baseline was recorded with different parameters.", file=sys.stderr)
+        ratios, regressions = compare(report, baseline, args.tolerance)
+        report["comparison"] = {"baseline": str(baseline_path), "ratios": ratios, "regressions": regressions}
+        for name, ratio in ratios.items():
+            marker = "  REGRESSION" if name in regressions else ""
+            print(f"{name}: {ratio:.2f}x baseline time{marker}", file=sys.stderr)
+        if regressions:
+            exit_code = 1
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        pathlib.Path(args.output).write_text(text + "\n")
+    else:
+        print(text)
+
+    if args.save_baseline:
+        baseline_path.write_text(text + "\n")
+        print(f"Baseline saved to {baseline_path}", file=sys.stderr)
+
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
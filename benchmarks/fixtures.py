@@ -0,0 +1,91 @@
+"""
+Synthetic Roo storage and template repository fixtures for the benchmarks.
+"""
+import json
+import random
+import pathlib
+
+ROO_EXTENSION_ID = "rooveterinaryinc.roo-cline"
+PLACEHOLDER = "{{repo-full-path}}"
+
+
+def roo_storage_dir(home_dir):
+    """Returns the Roo globalStorage directory inside a fake home directory."""
+    return pathlib.Path(home_dir) / ".vscode-server" / "data" / "User" / "globalStorage" / ROO_EXTENSION_ID
+
+
+def make_messages(count, content_size, seed=0):
+    """
+    Builds (api_history, ui_messages) lists with count messages in total,
+    alternating user and assistant turns with increasing timestamps.
+    """
+    rng = random.Random(seed)
+    words = ["read_file", "apply_diff", "src/app.py", "error", "test", "fixed", "the", "a", "function", "value"]
+    api_history = []
+    ui_messages = []
+    for i in range(count):
+        text = " ".join(rng.choice(words) for _ in range(max(1, content_size // 6)))
+        if i % 2 == 0:
+            ui_messages.append({"ts": 1700000000000 + i, "timestamp": 1700000000000 + i, "type": "say", "message": text})
+        else:
+            api_history.append({"role": "assistant", "timestamp": 1700000000000 + i, "content": text})
+    return api_history, ui_messages
+
+
+def make_roo_storage(home_dir, workspace, tasks, messages, content_size=200, state_padding=0, other_workspaces=0):
+    """
+    Creates a Roo globalStorage tree under home_dir with a global state file
+    holding a taskHistory of the given number of tasks for workspace, plus
+    other_workspaces tasks that belong elsewhere. state_padding adds that
+    many bytes of unrelated state before taskHistory, to model large state blobs.
+    Returns the path of the global state file.
+    """
+    storage_dir = roo_storage_dir(home_dir)
+    storage_dir.mkdir(parents=True, exist_ok=True)
+    (storage_dir / "settings").mkdir(exist_ok=True)
+
+    history = []
+    for i in range(tasks + other_workspaces):
+        task_id = f"bench-task-{i:06d}"
+        task_workspace = str(workspace) if i < tasks else f"/nonexistent/workspace-{i}"
+        history.append({"id": task_id, "taskId": task_id, "ts": 1700000000000 + i, "task": f"Task {i}", "workspace": task_workspace})
+
+        task_dir = storage_dir / task_id
+        task_dir.mkdir(exist_ok=True)
+        api_history, ui_messages = make_messages(messages, content_size, seed=i)
+        (task_dir / "api_conversation_history.json").write_text(json.dumps(api_history), encoding="utf-8")
+        (task_dir / "ui_messages.json").write_text(json.dumps(ui_messages), encoding="utf-8")
+
+    padding = {f"setting{i}": "x" * 1000 for i in range(state_padding // 1000)}
+    state_file = storage_dir / "state.json"
+    with open(state_file, "w", encoding="utf-8") as f:
+        json.dump({"padding": padding, "taskHistory": history}, f)
+    return state_file
+
+
+def make_template_repo(templates_dir, files, file_size=2000, placeholder_ratio=0.5, seed=0):
+    """
+    Creates a template repository with the given number of files spread over
+    a few component directories, plus a .git directory that deploy must skip.
+    About placeholder_ratio of the files contain the repo path placeholder.
+    """
+    rng = random.Random(seed)
+    templates_dir = pathlib.Path(templates_dir)
+    (templates_dir / ".git" / "objects").mkdir(parents=True, exist_ok=True)
+    (templates_dir / ".git" / "HEAD").write_text("ref: refs/heads/main\n")
+
+    components = ["cdk", "typescript", "python", "rules", "docs"]
+    body = ("Lorem ipsum dolor sit amet. " * (file_size // 28 + 1))[:file_size]
+    for i in range(files):
+        if i < 2:
+            relative_path = pathlib.Path(["system-prompt-architect-gh.md", "system-prompt-code-gh.md"][i])
+        else:
+            relative_path = pathlib.Path(components[i % len(components)]) / f"rule-{i:05d}.md"
+        target = templates_dir / relative_path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if rng.random() < placeholder_ratio:
+            content = f"Repository: {PLACEHOLDER}\n{body}\nSee {PLACEHOLDER}/README.md\n"
+        else:
+            content = body + "\n"
+        target.write_text(content, encoding="utf-8")
+    return templates_dir
@@ -0,0 +1,151 @@
+"""
+Import-time measurement for the roo-conf CLI, based on python -X importtime.
+
+Runs CLI invocations in fresh interpreters, records the modules each one
+imports on top of a bare interpreter and the time spent importing them,
+and checks the result against a budget: a maximum import time and a list
+of modules that must stay lazy for that invocation.
+
+    python benchmarks/importtime.py            # report as JSON
+    python benchmarks/importtime.py --check    # also exit 1 when over budget
+
+tests/test_importtime.py runs the same check as part of the test suite.
+"""
+import os
+import re
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+import pathlib
+
+SRC_DIR = pathlib.Path(__file__).resolve().parent.parent / "src"
+
+# Modules that only specific subcommands need. None of them may be imported
+# just to start the CLI, parse arguments or show help. shutil is not listed
+# because argparse itself imports it when a parser is created.
+HEAVY_MODULES = [
+    "roo_conf.deploy",
+    "roo_conf.extract",
+    "roo_conf.settings_manager",
+    "roo_conf.template_cache",
+    "roo_conf.search_index",
+    "roo_conf.conversation_export",
+    "roo_conf.profiling",
+    "roo_conf.template_bundle",
+    "roo_conf.output_pipeline",
+    "roo_conf.conversation_store",
+    "roo_conf.conversation_codecs",
+    "subprocess",
+    "glob",
+    "difflib",
+    "platform",
+    "concurrent.futures",
+    "importlib.resources",
+    "sqlite3",
+    "cProfile",
+]
+
+# Budgets per invocation. Times are the sum of the self times of the modules
+# imported on top of a bare interpreter, taking the fastest of the runs.
+# They leave headroom for timing noise; importing every subcommand eagerly
+# costs well over 50 ms, and the forbidden lists catch that precisely.
+BUDGETS = {
+    "--help": {"max_import_us": 50000, "forbidden": HEAVY_MODULES + ["roo_conf.config"]},
+    "config": {"max_import_us": 50000, "forbidden": HEAVY_MODULES},
+    "deploy --help": {"max_import_us": 50000, "forbidden": HEAVY_MODULES + ["roo_conf.config"]},
+    "extract-conversations --help": {"max_import_us": 50000, "forbidden": HEAVY_MODULES + ["roo_conf.config"]},
+}
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)\s*$")
+
+
+def _run_importtime(code, env):
+    """Runs code in a fresh interpreter with -X importtime and returns {module: self_us}."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        env=env, capture_output=True, text=True,
+    )
+    modules = {}
+    for line in completed.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            modules[match.group(4)] = int(match.group(1))
+    return modules
+
+
+def measure(invocation, env, baseline_modules, runs):
+    """Measures one CLI invocation. Returns the imported modules and the fastest total import time."""
+    argv = ["roo-conf", *invocation.split()]
+    code = (
+        f"import sys; sys.argv = {argv!r}\n"
+        "from roo_conf import main\n"
+        "try:\n"
+        "    main()\n"
+        "except SystemExit:\n"
+        "    pass\n"
+    )
+    best_total = None
+    imported = {}
+    for _ in range(runs):
+        modules = _run_importtime(code, env)
+        imported = {name: us for name, us in modules.items() if name not in baseline_modules}
+        total = sum(imported.values())
+        best_total = total if best_total is None else min(best_total, total)
+    return imported, best_total
+
+
+def check_budgets(runs=5):
+    """
+    Measures every invocation in BUDGETS, with HOME pointing at an empty
+    temporary directory. Returns the report and a list of budget failures.
+    """
+    with tempfile.TemporaryDirectory(prefix="roo-conf-importtime-") as home_dir:
+        env = dict(os.environ)
+        env["HOME"] = home_dir # Keep `roo-conf config` away from the real configuration
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(SRC_DIR), env.get("PYTHONPATH")]))
+
+        baseline_modules = set(_run_importtime("pass", env))
+        report = {}
+        failures = []
+        for invocation, budget in BUDGETS.items():
+            imported, total_us = measure(invocation, env, baseline_modules, runs)
+            forbidden = [name for name in budget["forbidden"] if name in imported]
+            slowest = sorted(imported.items(), key=lambda item: item[1], reverse=True)[:10]
+            report[invocation] = {
+                "import_us": total_us,
+                "max_import_us": budget["max_import_us"],
+                "modules": len(imported),
+                "slowest_modules": dict(slowest),
+                "forbidden_imported": forbidden,
+            }
+            if forbidden:
+                failures.append(f"'roo-conf {invocation}' imports {', '.join(forbidden)}")
+            if total_us > budget["max_import_us"]:
+                failures.append(f"'roo-conf {invocation}' spends {total_us} us importing modules (budget {budget['max_import_us']} us)")
+            print(f"roo-conf {invocation}: {total_us} us in {len(imported)} modules", file=sys.stderr)
+    return report, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure roo-conf CLI import time with python -X importtime.")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per invocation; the fastest is reported.")
+    parser.add_argument("--check", action="store_true", help="Exit with status 1 when an invocation exceeds its budget.")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout.")
+    args = parser.parse_args()
+
+    report, failures = check_budgets(args.runs)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        pathlib.Path(args.output).write_text(text + "\n")
+    else:
+        print(text)
+
+    for failure in failures:
+        print(f"Over budget: {failure}", file=sys.stderr)
+    return 1 if args.check and failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,33 @@
+"""
+Hatch build hook generating roo_conf/prompts.bundle from the prompt files
+when a wheel is built, so a released package always ships a bundle that
+matches its prompts. The bundle is not kept in the repository.
+"""
+import sys
+import shutil
+import pathlib
+import tempfile
+
+from hatchling.builders.hooks.plugin.interface import BuildHookInterface
+
+
+class CustomBuildHook(BuildHookInterface):
+
+    def initialize(self, version, build_data):
+        if version == "editable":
+            return # Source trees read the prompt files one by one
+        package_dir = pathlib.Path(self.root) / "src" / "roo_conf"
+        sys.path.insert(0, str(package_dir.parent))
+        try:
+            from roo_conf.template_bundle import BUNDLE_FILE_NAME, build_bundle
+        finally:
+            sys.path.remove(str(package_dir.parent))
+
+        self._bundle_dir = tempfile.mkdtemp(prefix="roo-conf-bundle-")
+        bundle_path = pathlib.Path(self._bundle_dir) / BUNDLE_FILE_NAME
+        build_bundle(package_dir / "prompts", bundle_path)
+        build_data["force_include"][str(bundle_path)] = f"roo_conf/{BUNDLE_FILE_NAME}"
+
+    def finalize(self, version, build_data, artifact_path):
+        if getattr(self, "_bundle_dir", None):
+            shutil.rmtree(self._bundle_dir, ignore_errors=True)
@@ -0,0 +1,344 @@
+import os
+import sys
+import argparse
+from importlib import import_module
+
+
+def _positive_int(value):
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid number '{value}'")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, not {number}")
+    return number
+
+
+def _size(value):
+    """Parses a size in bytes, with an optional K, M or G suffix for KiB, MiB or GiB."""
+    multiplier = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}.get(value[-1:].upper())
+    try:
+        size = int(float(value[:-1] if multiplier else value) * (multiplier or 1))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid size '{value}'")
+    if size < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1 byte, not {value}")
+    return size
+
+
+def _add_extract_conversations_arguments(parser):
+    parser.add_argument(
+        "target_repo_path",
+        nargs="?", # Make the argument optional
+        default=".", # Default to current working directory
+        help="Path to the target repository (defaults to current working directory)"
+    )
+    targets = parser.add_mutually_exclusive_group()
+    targets.add_argument(
+        "--repos",
+        nargs="+",
+        metavar="REPO",
+        help="Extract conversations for these repositories instead, reading the task history once. Each value may be a directory, a glob pattern, or a file listing one repository path per line."
+    )
+    targets.add_argument(
+        "--all-workspaces",
+        action="store_true",
+        help="Extract conversations for every workspace in the task history that exists on disk, reading the task history once."
+    )
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of worker processes used to convert conversations (defaults to the number of CPU cores)"
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-extract every conversation, ignoring the manifest of previously extracted tasks"
+    )
+    parser.add_argument(
+        "--store",
+        action="store_true",
+        help="Write each Markdown file as a read-only link into the shared conversation store in ~/.config/roo-conf/conversation_store instead of a plain copy"
+    )
+    parser.add_argument(
+        "--format",
+        choices=["markdown", "jsonl", "sqlite"],
+        default="markdown",
+        help="Output format: one Markdown file per conversation (default), or one row per message in a single JSON Lines or SQLite file"
+    )
+    parser.add_argument(
+        "--output",
+        help="File written by --format jsonl or sqlite (defaults to .roo-conf/conversations/messages.jsonl or messages.sqlite in each target repository). With --repos or --all-workspaces, the rows of every repository go to this one file."
+    )
+    parser.add_argument(
+        "--since",
+        help="Only extract messages at or after this time (ISO 8601 date or time, or milliseconds since the epoch)."
+    )
+    parser.add_argument(
+        "--until",
+        help="Only extract messages at or before this time (ISO 8601 date or time, or milliseconds since the epoch)."
+    )
+    parser.add_argument(
+        "--last",
+        type=_positive_int,
+        metavar="N",
+        help="Only extract the last N messages of each conversation (within --since and --until)."
+    )
+    parser.add_argument(
+        "--chunk-messages",
+        type=_positive_int,
+        metavar="N",
+        help="Split conversations of more than N messages into part files of at most N messages, with the conversation file as an index page linking them."
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=_size,
+        metavar="SIZE",
+        help="Split conversations larger than SIZE into part files of at most about SIZE each, with the conversation file as an index page linking them. SIZE is in bytes, or with a K, M or G suffix."
+    )
+    parser.add_argument(
+        "--compress",
+        choices=["gzip", "xz", "zstd"],
+        help="Write the Markdown files compressed, as .md.gz, .md.xz or .md.zst (zstd requires Python 3.14 or later). Read them with 'roo-conf show'."
+    )
+
+
+def _add_deploy_arguments(parser):
+    parser.add_argument(
+        "components",
+        nargs="*", # 0 or more arguments
+        help="Optional list of components (e.g., cdk, typescript) or glob patterns to deploy."
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Show which files would be created or updated, with a diff summary, without writing anything."
+    )
+    parser.add_argument(
+        "--repos",
+        nargs="+",
+        metavar="REPO",
+        help="Deploy to these repositories instead of the current directory. Each value may be a directory, a glob pattern, or a file listing one repository path per line."
+    )
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=None,
+        help="Number of repositories deployed concurrently with --repos (defaults to min(32, CPU cores + 4))."
+    )
+
+
+def _add_edit_arguments(parser):
+    parser.add_argument(
+        "file_name",
+        nargs="?", # Makes the argument optional
+        help="Name of the template file to edit."
+    )
+
+
+def _add_config_arguments(parser):
+    parser.add_argument(
+        "key",
+        nargs="?", # Make key optional
+        help="Configuration key (e.g., 'editor', 'template_source_repo')."
+    )
+    parser.add_argument(
+        "value",
+        nargs="?", # Make value optional
+        help="Configuration value."
+    )
+
+
+def _add_sync_modes_arguments(parser):
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and synchronize again whenever a custom_modes.yaml file changes."
+    )
+    parser.add_argument(
+        "--debounce",
+        type=int,
+        default=200,
+        metavar="MS",
+        help="With --watch, wait until no change has been seen for this many milliseconds before synchronizing (default: 200)."
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=int,
+        default=500,
+        metavar="MS",
+        help="With --watch, how often to check the files when inotify is not available, in milliseconds (default: 500)."
+    )
+    parser.add_argument(
+        "--polling",
+        action="store_true",
+        help="With --watch, check the files periodically instead of using inotify."
+    )
+
+
+def _add_gc_arguments(parser):
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Show how many stored conversations would be removed without removing them."
+    )
+    parser.add_argument(
+        "--min-age",
+        type=int,
+        default=60,
+        metavar="MINUTES",
+        help="Keep unreferenced conversations stored less than this many minutes ago, so a running extraction is not disturbed (default: 60)."
+    )
+
+
+def _add_search_arguments(parser):
+    parser.add_argument(
+        "query",
+        nargs="+",
+        help="Terms to search for. Every term must match; punctuation inside a term, as in file paths, is allowed."
+    )
+    parser.add_argument(
+        "--repo",
+        default=".",
+        help="Repository whose extracted conversations are searched (defaults to current working directory)."
+    )
+    parser.add_argument(
+        "--task",
+        help="Only search the conversation with this task id."
+    )
+    parser.add_argument(
+        "--role",
+        choices=["user", "assistant"],
+        help="Only search messages from this role."
+    )
+    parser.add_argument(
+        "--since",
+        help="Only search messages at or after this time (ISO 8601 date or time, or milliseconds since the epoch)."
+    )
+    parser.add_argument(
+        "--until",
+        help="Only search messages at or before this time (ISO 8601 date or time, or milliseconds since the epoch)."
+    )
+    parser.add_argument(
+        "-n", "--limit",
+        type=int,
+        default=20,
+        help="Maximum number of matches to show (default: 20)."
+    )
+    parser.add_argument(
+        "--fts",
+        action="store_true",
+        help="Treat the query as SQLite FTS5 query syntax (AND, OR, NOT, NEAR, prefix*)."
+    )
+
+
+def _add_show_arguments(parser):
+    parser.add_argument(
+        "task_id",
+        help="Id of the task whose conversation is printed."
+    )
+    parser.add_argument(
+        "--repo",
+        default=".",
+        help="Repository the conversation was extracted to (defaults to current working directory)."
+    )
+
+
+def _add_no_arguments(parser):
+    pass
+
+
+# Subcommands as (name, help, argument builder, implementing module, handler name).
+# The implementing module is only imported when its subcommand runs.
+COMMANDS = [
+    ("extract-conversations", "Extract conversation history from VS Code global storage", _add_extract_conversations_arguments, "extract", "extract_conversations_command"),
+    ("deploy", "Deploy prompt files to the .roo directory.", _add_deploy_arguments, "deploy", "deploy_prompts"),
+    ("edit", "Edit a source template file.", _add_edit_arguments, "deploy", "edit_prompt"),
+    ("config", "Configure roo-conf settings.", _add_config_arguments, "config", "config_command"),
+    ("pull", "Pull prompt templates from the configured remote repository.", _add_no_arguments, "deploy", "pull_templates"),
+    ("search", "Search extracted conversations.", _add_search_arguments, "search_index", "search_command"),
+    ("show", "Print an extracted conversation, decompressing it if needed.", _add_show_arguments, "conversation_codecs", "show_command"),
+    ("sync-modes", "Synchronize custom_modes.yaml between VS Code and VS Code Insiders.", _add_sync_modes_arguments, "deploy", "sync_modes"),
+    ("gc", "Remove stored conversations that no extraction output refers to.", _add_gc_arguments, "conversation_store", "gc_command"),
+]
+
+
+# Global options that take a value, and the environment variables that enable
+# profiling. Both are known here so that profiling is only imported when used.
+GLOBAL_OPTIONS_WITH_VALUES = {"--trace-file", "--cprofile"}
+PROFILE_ENV_VARS = {"ROO_CONF_PROFILE", "ROO_CONF_CPROFILE"}
+
+
+def build_parser(selected_command=None):
+    """
+    Builds the argument parser. When selected_command is given, only that
+    subcommand's arguments are added; the others are registered by name so
+    they still appear in the help output.
+    """
+    parser = argparse.ArgumentParser(prog="roo-conf", description="roo-conf CLI tool")
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Time the phases of the command, print a summary table to stderr and write a Chrome trace event file (also enabled by ROO_CONF_PROFILE=1)."
+    )
+    parser.add_argument(
+        "--trace-file",
+        metavar="PATH",
+        help="Trace file written by --profile (default: roo-conf-trace.json). Setting ROO_CONF_PROFILE to a path also enables profiling."
+    )
+    parser.add_argument(
+        "--cprofile",
+        metavar="PATH",
+        help="Run the command under cProfile and dump its statistics to PATH (also set by ROO_CONF_CPROFILE)."
+    )
+    subparsers = parser.add_subparsers(dest="command", help="Available commands")
+
+    for name, help_text, add_arguments, module_name, handler_name in COMMANDS:
+        subparser = subparsers.add_parser(name, help=help_text)
+        if selected_command is None or selected_command == name:
+            add_arguments(subparser)
+        subparser.set_defaults(handler=(module_name, handler_name))
+
+    return parser
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+
+    # The subcommand is the first positional argument that is not the value of a global option
+    command_names = {command[0] for command in COMMANDS}
+    selected_command = None
+    skip_value = False
+    for arg in argv:
+        if skip_value:
+            skip_value = False
+        elif arg in GLOBAL_OPTIONS_WITH_VALUES:
+            skip_value = True
+        elif not arg.startswith("-"):
+            selected_command = arg
+            break
+    parser = build_parser(selected_command if selected_command in command_names else None)
+    args = parser.parse_args(argv)
+
+    if hasattr(args, "handler"):
+        module_name, handler_name = args.handler
+        trace_path, cprofile_path = None, None
+        if args.profile or args.trace_file or args.cprofile or PROFILE_ENV_VARS.intersection(os.environ):
+            from .profiling import profile_settings
+            trace_path, cprofile_path = profile_settings(args.profile, args.trace_file, args.cprofile)
+        if trace_path is None and cprofile_path is None:
+            getattr(import_module(f".{module_name}", __package__), handler_name)(args)
+            return
+
+        from .profiling import profile_session, span
+        with profile_session(args.command, trace_path, cprofile_path):
+            with span("import", module=module_name):
+                module = import_module(f".{module_name}", __package__)
+            getattr(module, handler_name)(args)
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
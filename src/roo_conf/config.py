@@ -0,0 +1,140 @@
+import os
+import json
+import contextlib
+from .paths import CONFIG_DIR, CONFIG_FILE
+
+
+@contextlib.contextmanager
+def _file_lock(lock_path):
+    """Holds an exclusive advisory lock on lock_path for the duration of the block."""
+    with open(lock_path, 'a') as lock_file:
+        try:
+            import fcntl
+        except ImportError:
+            fcntl = None # Not available on Windows
+
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        else:
+            import msvcrt
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class ConfigStore:
+    """
+    The configuration file, loaded at most once per process.
+    Mutations are applied in memory and written back by flush(); inside a
+    batch() block they are coalesced into a single write. Writes take an
+    advisory lock, merge the pending changes into the current file contents
+    so updates from concurrent processes are not lost, and replace the file
+    atomically through a temporary file.
+    """
+
+    def __init__(self, config_file):
+        self.config_file = config_file
+        self.lock_file = config_file.with_name(config_file.name + ".lock")
+        self._data = None
+        self._pending = {}
+        self._batch_depth = 0
+
+    def _read(self):
+        if self.config_file.exists():
+            with open(self.config_file, 'r') as f:
+                return json.load(f)
+        return {}
+
+    def load(self):
+        """Returns the configuration, reading the file on first use only."""
+        if self._data is None:
+            self._data = self._read()
+        return self._data
+
+    def get(self, key, default=None):
+        return self.load().get(key, default)
+
+    def set(self, key, value):
+        """Sets a key, writing it immediately unless a batch is open."""
+        self.load()[key] = value
+        self._pending[key] = value
+        if not self._batch_depth:
+            self.flush()
+
+    @contextlib.contextmanager
+    def batch(self):
+        """Coalesces every set() made inside the block into one write."""
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self.flush()
+
+    def flush(self):
+        """Writes pending changes to the configuration file."""
+        if not self._pending:
+            return
+        self.config_file.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.config_file.with_name(f".{self.config_file.name}.{os.getpid()}.tmp")
+        with _file_lock(self.lock_file):
+            # Re-read under the lock so changes made by other processes are kept
+            data = self._read()
+            data.update(self._pending)
+            try:
+                with open(temp_path, 'w') as f:
+                    json.dump(data, f, indent=4)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_path, self.config_file)
+            except BaseException:
+                with contextlib.suppress(OSError):
+                    temp_path.unlink()
+                raise
+        self._data = data
+        self._pending = {}
+
+
+_store = ConfigStore(CONFIG_FILE)
+
+
+def config_batch():
+    """Context manager that coalesces set_config calls into a single write."""
+    return _store.batch()
+
+
+def get_config():
+    """Reads the configuration file."""
+    return dict(_store.load())
+
+def set_config(key, value):
+    """Writes a key-value pair to the configuration file."""
+    CONFIG_DIR.mkdir(parents=True, exist_ok=True)
+    _store.set(key, value)
+    print(f"Configuration updated: {key} = {value}")
+
+def print_config():
+    """Prints the current configuration."""
+    config = get_config()
+    if config:
+        print("Current configuration:")
+        for key, value in config.items():
+            print(f"  {key}: {value}")
+    else:
+        print("No configuration found.")
+
+
+def config_command(args):
+    """Sets a configuration value, or prints the configuration when no value is given."""
+    if args.key and args.value is not None:
+        set_config(args.key, args.value)
+    else:
+        print_config()
@@ -0,0 +1,134 @@
+import os
+import sys
+import zlib
+import gzip
+import lzma
+import shutil
+from pathlib import Path
+
+from .conversation_manifest import load_manifest
+
+# File name suffix of each --compress codec, added after ".md"
+COMPRESSION_SUFFIXES = {'gzip': ".gz", 'xz': ".xz", 'zstd': ".zst"}
+
+# Rendered text is collected into blocks of about this size before it is
+# passed to the compressor, as many tiny compress() calls are slow
+_BLOCK_SIZE = 64 * 1024
+
+
+def _zstd():
+    try:
+        from compression import zstd # Added to the standard library in Python 3.14
+    except ImportError:
+        return None
+    return zstd
+
+
+def codec_available(codec):
+    return codec != 'zstd' or _zstd() is not None
+
+
+def _compressor(codec):
+    if codec == 'gzip':
+        # A gzip member without a file name or modification time, so equal
+        # content compresses to equal bytes
+        return zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    if codec == 'xz':
+        return lzma.LZMACompressor()
+    if codec == 'zstd':
+        zstd = _zstd()
+        if zstd is None:
+            raise ValueError("zstd compression requires Python 3.14 or later")
+        return zstd.ZstdCompressor()
+    raise ValueError(f"unknown compression codec '{codec}'")
+
+
+class BlockWriter:
+    """
+    Writes str or bytes pieces to file (anything with a write method),
+    compressed with codec when one is given, as they are produced, so a
+    rendered conversation is never held as a whole. Pieces are collected
+    into blocks of about _BLOCK_SIZE bytes first. Call close() to write the
+    rest; it does not close file.
+    """
+
+    def __init__(self, file, codec=None):
+        self._file = file
+        self._compressor = _compressor(codec) if codec else None
+        self._block = []
+        self._block_size = 0
+
+    def write(self, piece):
+        if isinstance(piece, str):
+            piece = piece.encode('utf-8')
+        self._block.append(piece)
+        self._block_size += len(piece)
+        if self._block_size >= _BLOCK_SIZE:
+            self._write_block()
+
+    def _write_block(self):
+        data = b"".join(self._block)
+        self._block = []
+        self._block_size = 0
+        if self._compressor is not None:
+            data = self._compressor.compress(data)
+        if data:
+            self._file.write(data)
+
+    def close(self):
+        self._write_block()
+        if self._compressor is not None:
+            self._file.write(self._compressor.flush())
+
+
+def open_conversation(path):
+    """Opens an extracted conversation file for reading bytes, decompressing it on the fly according to its suffix."""
+    if path.suffix == COMPRESSION_SUFFIXES['gzip']:
+        return gzip.open(path, 'rb')
+    if path.suffix == COMPRESSION_SUFFIXES['xz']:
+        return lzma.open(path, 'rb')
+    if path.suffix == COMPRESSION_SUFFIXES['zstd']:
+        zstd = _zstd()
+        if zstd is None:
+            raise OSError(f"reading {path.name} requires Python 3.14 or later for zstd support")
+        return zstd.open(path, 'rb')
+    return open(path, 'rb')
+
+
+def _conversation_files(output_dir, task_id):
+    """
+    Returns the files holding the extracted conversation of task_id in
+    output_dir, in reading order: its part files when it was split, or its
+    single file. Returns an empty list when it was not extracted.
+    """
+    entry = load_manifest(output_dir).get(task_id)
+    if isinstance(entry, dict) and isinstance(entry.get('output'), str):
+        names = [part.get('output') for part in entry.get('parts', ()) if isinstance(part, dict)] or [entry['output']]
+        return [output_dir / name for name in names if isinstance(name, str) and Path(name).name == name]
+    # Without a manifest entry, look for the file named as extraction names it
+    safe_task_id = "".join(c for c in task_id if c.isalnum() or c in ('-', '_')).rstrip()
+    for suffix in ["", *COMPRESSION_SUFFIXES.values()]:
+        path = output_dir / f"conversation_{safe_task_id}.md{suffix}"
+        if path.exists():
+            return [path]
+    return []
+
+
+def show_command(args):
+    """Prints the extracted conversation of a task, decompressing it on the fly."""
+    output_dir = Path(args.repo).resolve() / ".roo-conf" / "conversations"
+    paths = _conversation_files(output_dir, args.task_id)
+    if not paths:
+        print(f"Error: No extracted conversation for task {args.task_id} in {output_dir}. Run 'roo-conf extract-conversations' first.", file=sys.stderr)
+        return
+
+    try:
+        for path in paths:
+            with open_conversation(path) as f:
+                shutil.copyfileobj(f, sys.stdout.buffer, _BLOCK_SIZE)
+        sys.stdout.buffer.flush()
+    except BrokenPipeError:
+        # The reader, such as a pager, exited early; keep the final flush at exit from failing again
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    except (OSError, EOFError, lzma.LZMAError, zlib.error) as e:
+        print(f"Error: Could not read {path}: {e}", file=sys.stderr)
@@ -0,0 +1,157 @@
+import os
+import json
+import sqlite3
+import hashlib
+
+from .search_index import normalize_timestamp
+
+EXPORT_FORMATS = ('jsonl', 'sqlite')
+EXPORT_MANIFEST_SUFFIX = ".manifest.json"
+
+# Row fields, in output order
+ROW_FIELDS = ('task_id', 'workspace', 'position', 'role', 'timestamp', 'content_length', 'content')
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    task_id TEXT NOT NULL,
+    workspace TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    timestamp INTEGER,
+    content_length INTEGER NOT NULL,
+    content TEXT NOT NULL,
+    PRIMARY KEY (task_id, position)
+);
+CREATE INDEX IF NOT EXISTS messages_workspace ON messages (workspace);
+CREATE INDEX IF NOT EXISTS messages_timestamp ON messages (timestamp);
+"""
+
+
+def message_rows(task_id, workspace, messages):
+    """
+    Returns the normalized rows of a conversation, one dict per message in
+    conversation order. Timestamps are milliseconds since the epoch (None when
+    unknown); content that is not a string, such as a list of content blocks
+    with tool calls, is stored as its JSON text.
+    """
+    rows = []
+    for position, (source, timestamp, content) in enumerate(messages):
+        if content is None:
+            content = ""
+        elif not isinstance(content, str):
+            content = json.dumps(content, ensure_ascii=False, default=str)
+        rows.append({
+            'task_id': str(task_id),
+            'workspace': workspace,
+            'position': position,
+            'role': source,
+            'timestamp': normalize_timestamp(timestamp),
+            'content_length': len(content),
+            'content': content,
+        })
+    return rows
+
+
+def rows_digest(rows):
+    """Returns a SHA-256 hex digest identifying the content of rows."""
+    digest = hashlib.sha256()
+    for row in rows:
+        digest.update(json.dumps([row[field] for field in ROW_FIELDS], ensure_ascii=False).encode('utf-8'))
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+class JsonlExport:
+    """
+    Appends rows to a JSON Lines file, one message per line. When a task
+    changes, only the messages added after the previously exported ones are
+    appended if the earlier messages are unchanged. Otherwise all of the
+    task's messages are appended again, and close() rewrites the file once
+    without the rows earlier runs wrote for it, so each (task_id, position)
+    appears once.
+    """
+
+    def __init__(self, path, truncate=False):
+        self.path = path
+        self._file = open(path, 'w' if truncate else 'a', encoding='utf-8')
+        # Rows before this offset were written by earlier runs
+        self._previous_size = os.fstat(self._file.fileno()).st_size
+        self._replaced_tasks = set()
+
+    def write_task(self, task_id, rows, previous_entry):
+        """Writes the rows of a task and returns the number of rows written."""
+        exported = (previous_entry or {}).get('rows')
+        start = 0
+        if exported:
+            if len(rows) >= exported and rows_digest(rows[:exported]) == previous_entry.get('rows_digest'):
+                start = exported
+            else:
+                self._replaced_tasks.add(str(task_id))
+        for row in rows[start:]:
+            self._file.write(json.dumps(row, ensure_ascii=False))
+            self._file.write("\n")
+        return len(rows) - start
+
+    def _drop_previous_rows(self):
+        """
+        Rewrites the file through a temporary file, leaving out the rows
+        written by earlier runs for the tasks whose rows were replaced.
+        """
+        temp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        try:
+            with open(self.path, 'rb') as source, open(temp_path, 'wb') as target:
+                position = 0
+                for line in source:
+                    previous = position < self._previous_size
+                    position += len(line)
+                    if previous:
+                        try:
+                            task_id = json.loads(line).get('task_id')
+                        except (ValueError, AttributeError):
+                            task_id = None
+                        if task_id in self._replaced_tasks:
+                            continue
+                    target.write(line)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            try:
+                temp_path.unlink()
+            except OSError:
+                pass
+            raise
+
+    def close(self):
+        self._file.close()
+        if self._replaced_tasks:
+            self._drop_previous_rows()
+
+
+class SqliteExport:
+    """Stores rows in a SQLite messages table, replacing the rows of a task when it changes."""
+
+    def __init__(self, path, truncate=False):
+        self.path = path
+        self._connection = sqlite3.connect(path)
+        if truncate:
+            self._connection.execute("DROP TABLE IF EXISTS messages")
+        self._connection.executescript(_SQLITE_SCHEMA)
+
+    def write_task(self, task_id, rows, previous_entry):
+        """Writes the rows of a task and returns the number of rows written."""
+        self._connection.execute("DELETE FROM messages WHERE task_id = ?", (str(task_id),))
+        self._connection.executemany(
+            f"INSERT INTO messages ({', '.join(ROW_FIELDS)}) VALUES ({', '.join('?' * len(ROW_FIELDS))})",
+            ([row[field] for field in ROW_FIELDS] for row in rows),
+        )
+        return len(rows)
+
+    def close(self):
+        self._connection.commit()
+        self._connection.close()
+
+
+def open_export(export_format, path, truncate=False):
+    """Opens the writer for export_format ('jsonl' or 'sqlite') at path."""
+    if export_format == 'jsonl':
+        return JsonlExport(path, truncate)
+    return SqliteExport(path, truncate)
@@ -0,0 +1,69 @@
+import os
+import sys
+import json
+import hashlib
+
+MANIFEST_FILE_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+
+def load_manifest(output_dir, file_name=MANIFEST_FILE_NAME):
+    """
+    Reads the task entries of the extraction manifest file_name in output_dir.
+    Returns an empty dict if the manifest is missing, unreadable or from another version.
+    """
+    try:
+        with open(output_dir / file_name, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+    if not isinstance(manifest, dict) or manifest.get('version') != MANIFEST_VERSION:
+        return {}
+    tasks = manifest.get('tasks')
+    return tasks if isinstance(tasks, dict) else {}
+
+
+def save_manifest(output_dir, tasks, file_name=MANIFEST_FILE_NAME):
+    """Writes the extraction manifest file_name to output_dir through a temporary file."""
+    manifest_path = output_dir / file_name
+    temp_path = manifest_path.with_name(f".{file_name}.{os.getpid()}.tmp")
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': MANIFEST_VERSION, 'tasks': tasks}, f, indent=1, sort_keys=True)
+        os.replace(temp_path, manifest_path)
+    except OSError as e:
+        print(f"Warning: Could not write extraction manifest {manifest_path}: {e}", file=sys.stderr)
+        try:
+            temp_path.unlink()
+        except OSError:
+            pass
+
+
+def read_sources(source_paths, previous_entry):
+    """
+    Fingerprints the source files of a task against its previous manifest entry.
+    source_paths maps a file name to its path. A file whose mtime and size match
+    the previous record is not read; any other file is read once and hashed.
+    Returns (sources, contents, unchanged): the new manifest records, the bytes
+    of the files that were read, and whether every content hash is unchanged.
+    """
+    previous_sources = (previous_entry or {}).get('sources') or {}
+    sources = {}
+    contents = {}
+    unchanged = bool(previous_sources)
+
+    for name, path in source_paths.items():
+        file_stat = path.stat()
+        record = {'mtime_ns': file_stat.st_mtime_ns, 'size': file_stat.st_size}
+        previous = previous_sources.get(name) or {}
+
+        if previous.get('sha256') and previous.get('mtime_ns') == record['mtime_ns'] and previous.get('size') == record['size']:
+            record['sha256'] = previous['sha256']
+        else:
+            contents[name] = path.read_bytes()
+            record['sha256'] = hashlib.sha256(contents[name]).hexdigest()
+            if record['sha256'] != previous.get('sha256'):
+                unchanged = False
+        sources[name] = record
+
+    return sources, contents, unchanged
@@ -0,0 +1,258 @@
+import os
+import sys
+import json
+import time
+import errno
+import shutil
+import threading
+from pathlib import Path
+
+from .paths import CONFIG_DIR
+from .config import _file_lock
+from .conversation_manifest import load_manifest
+
+# Rendered conversations are stored once, named by the SHA-256 of their
+# content and sharded by its first two hex digits. Extraction outputs are
+# hardlinks (or reflinks) to these objects.
+CONVERSATION_STORE_DIR = CONFIG_DIR / "conversation_store"
+# Output directories whose manifests reference stored objects
+STORE_ROOTS_FILE = CONVERSATION_STORE_DIR / "roots.json"
+
+# ioctl request cloning a file's extents on Linux (btrfs, XFS, ...)
+_FICLONE = 0x40049409
+
+
+class ConversationStore:
+    """
+    A content-addressed store of rendered conversations. Objects are
+    read-only, so a hardlinked output cannot be edited in place into a
+    different document for every other link.
+    """
+
+    def __init__(self, store_dir=CONVERSATION_STORE_DIR):
+        self.store_dir = Path(store_dir)
+        self.roots_file = self.store_dir / STORE_ROOTS_FILE.name
+        self._shards = set()
+        self._shards_lock = threading.Lock()
+
+    def object_path(self, digest):
+        return self.store_dir / digest[:2] / digest[2:]
+
+    def shares_device(self, directory):
+        """Checks directory is on the file system holding the store, which links require."""
+        try:
+            self.store_dir.mkdir(parents=True, exist_ok=True)
+            return os.stat(directory).st_dev == os.stat(self.store_dir).st_dev
+        except OSError:
+            return False
+
+    def _ensure_shard(self, shard_dir):
+        if shard_dir not in self._shards:
+            shard_dir.mkdir(parents=True, exist_ok=True)
+            with self._shards_lock:
+                self._shards.add(shard_dir)
+
+    def _link(self, object_path, target_path):
+        """
+        Replaces target_path with a hardlink to object_path, or a reflink
+        where hardlinks are not supported, or a plain copy.
+        """
+        temp_path = target_path.with_name(f".{target_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            try:
+                os.link(object_path, temp_path)
+            except OSError as e:
+                if e.errno in (errno.ENOENT, errno.EEXIST):
+                    raise
+                if not _reflink(object_path, temp_path):
+                    shutil.copyfile(object_path, temp_path)
+            os.replace(temp_path, target_path)
+        except BaseException:
+            try:
+                temp_path.unlink()
+            except OSError:
+                pass
+            raise
+
+    def adopt(self, target_path, temp_path, digest):
+        """
+        Stores the file written to temp_path, on the file system of the
+        store, under its SHA-256 hex digest and makes target_path a link to
+        the stored copy. A new object takes over temp_path's data without
+        copying; if the object already exists, temp_path is removed.
+        Returns (status, bytes stored): status is 'unchanged' when
+        target_path is already linked to the object, and 'created' or
+        'updated' otherwise.
+        """
+        object_path = self.object_path(digest)
+        try:
+            target_stat = target_path.stat()
+        except FileNotFoundError:
+            target_stat = None
+        try:
+            self._ensure_shard(object_path.parent)
+            os.chmod(temp_path, 0o444)
+            try:
+                os.link(temp_path, object_path)
+            except FileExistsError:
+                try:
+                    if target_stat is None or not os.path.samestat(target_stat, object_path.stat()):
+                        self._link(object_path, target_path)
+                        return ('created' if target_stat is None else 'updated'), 0
+                    return 'unchanged', 0
+                except FileNotFoundError:
+                    # A concurrent gc removed the object; store this copy in its place
+                    os.link(temp_path, object_path)
+            except OSError as e:
+                if e.errno == errno.ENOENT:
+                    raise
+                # No hardlinks on this file system: store the file and link to it as _link can
+                os.replace(temp_path, object_path)
+                self._link(object_path, target_path)
+                return ('created' if target_stat is None else 'updated'), object_path.stat().st_size
+            # target_path becomes the temporary file, now also linked as the object
+            size = os.stat(temp_path).st_size
+            os.replace(temp_path, target_path)
+            return ('created' if target_stat is None else 'updated'), size
+        finally:
+            try:
+                temp_path.unlink()
+            except OSError:
+                pass
+
+    def roots(self):
+        """Returns the output directories registered as referencing stored objects."""
+        try:
+            with open(self.roots_file, 'r', encoding='utf-8') as f:
+                roots = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return []
+        return [root for root in roots if isinstance(root, str)] if isinstance(roots, list) else []
+
+    def _update_roots(self, update):
+        """Applies update to the list of roots under a lock and writes it back through a temporary file."""
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        with _file_lock(self.roots_file.with_name(self.roots_file.name + ".lock")):
+            roots = update(self.roots())
+            temp_path = self.roots_file.with_name(f".{self.roots_file.name}.{os.getpid()}.tmp")
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(sorted(set(roots)), f, indent=1)
+            os.replace(temp_path, self.roots_file)
+
+    def register_root(self, output_dir):
+        """Records output_dir, whose extraction manifest refers to stored objects, for gc."""
+        output_dir = str(output_dir)
+        if output_dir not in self.roots():
+            self._update_roots(lambda roots: roots + [output_dir])
+
+    def prune_roots(self):
+        """Forgets registered output directories that no longer exist."""
+        if self.roots_file.exists():
+            self._update_roots(lambda roots: [root for root in roots if Path(root).is_dir()])
+
+    def iter_objects(self):
+        """Yields (digest, path) for every stored object."""
+        for shard in sorted(self.store_dir.iterdir()):
+            if len(shard.name) != 2 or not shard.is_dir():
+                continue
+            for path in sorted(shard.iterdir()):
+                if not path.name.startswith('.'):
+                    yield shard.name + path.name, path
+
+
+def _reflink(source_path, target_path):
+    """Clones source_path to target_path sharing its extents. Returns False where unsupported."""
+    try:
+        import fcntl
+    except ImportError:
+        return False # Not available on Windows
+    try:
+        with open(source_path, 'rb') as source, open(target_path, 'wb') as target:
+            fcntl.ioctl(target.fileno(), _FICLONE, source.fileno())
+        return True
+    except OSError:
+        try:
+            os.unlink(target_path)
+        except OSError:
+            pass
+        return False
+
+
+def collect_garbage(store, min_age=3600, dry_run=False):
+    """
+    Removes stored objects that no extraction output refers to. An object
+    is reachable when the manifest of a registered output directory lists
+    its digest, for a conversation file or one of its part files; roots
+    whose directory is gone are dropped. Unreachable
+    objects are kept while other hardlinks to them remain, since removing
+    them would free nothing, and while they are younger than min_age
+    seconds, so a running extraction keeps the objects it just stored.
+    Returns a dict of counts and the number of bytes freed.
+    """
+    reachable = set()
+    live_roots = []
+    for root in store.roots():
+        root_path = Path(root)
+        if not root_path.is_dir():
+            continue
+        live_roots.append(root)
+        for entry in load_manifest(root_path).values():
+            if not isinstance(entry, dict):
+                continue
+            for record in [entry, *entry.get('parts', ())]:
+                if isinstance(record, dict) and isinstance(record.get('digest'), str):
+                    reachable.add(record['digest'])
+    if not dry_run:
+        store.prune_roots()
+
+    result = {'reachable': 0, 'linked': 0, 'recent': 0, 'removed': 0, 'freed': 0, 'roots': len(live_roots)}
+    if not store.store_dir.is_dir():
+        return result
+    now = time.time()
+    for digest, path in store.iter_objects():
+        try:
+            object_stat = path.lstat()
+        except OSError:
+            continue
+        if digest in reachable:
+            result['reachable'] += 1
+        elif object_stat.st_nlink > 1:
+            result['linked'] += 1
+        elif now - object_stat.st_mtime < min_age:
+            result['recent'] += 1
+        else:
+            if not dry_run:
+                try:
+                    path.unlink()
+                except OSError as e:
+                    print(f"Warning: Could not remove {path}: {e}", file=sys.stderr)
+                    continue
+            result['removed'] += 1
+            result['freed'] += object_stat.st_size
+
+    if not dry_run:
+        for shard in store.store_dir.iterdir():
+            if len(shard.name) != 2 or not shard.is_dir():
+                continue
+            for path in shard.iterdir():
+                # Temporary files left behind by an interrupted write
+                try:
+                    if path.name.endswith('.tmp') and now - path.lstat().st_mtime >= min_age:
+                        path.unlink()
+                except OSError:
+                    pass
+            try:
+                shard.rmdir() # Only succeeds once the shard is empty
+            except OSError:
+                pass
+    return result
+
+
+def gc_command(args):
+    """Removes rendered conversations from the store that no extraction output refers to."""
+    store = ConversationStore()
+    result = collect_garbage(store, min_age=args.min_age * 60, dry_run=args.dry_run)
+    action = "Would remove" if args.dry_run else "Removed"
+    print(f"{action} {result['removed']} unreferenced conversations ({result['freed'] / (1024 * 1024):.2f} MiB) from {store.store_dir}.")
+    print(f"Kept {result['reachable']} referenced by {result['roots']} output directories, "
+          f"{result['linked']} still linked from elsewhere and {result['recent']} stored in the last {args.min_age} minutes.")
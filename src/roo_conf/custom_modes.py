@@ -0,0 +1,217 @@
+import os
+import re
+import sys
+from .paths import CONFIG_DIR
+
+# The merged content of the last synchronization, used as the common
+# ancestor when both custom_modes.yaml files have changed since.
+CUSTOM_MODES_BASE_FILE = CONFIG_DIR / "custom_modes.base.yaml"
+# Versions of modes that lost a merge conflict, kept so they can be restored by hand.
+CUSTOM_MODES_CONFLICTS_FILE = CONFIG_DIR / "custom_modes.conflicts.yaml"
+
+_LIST_KEY_PATTERN = re.compile(r"^customModes:[ \t]*(?:#.*)?$")
+_EMPTY_LIST_PATTERN = re.compile(r"^customModes:[ \t]*\[[ \t]*\][ \t]*(?:#.*)?$")
+_SLUG_PATTERN = re.compile(r"^slug:[ \t]*(.*?)[ \t]*$")
+
+
+def _indentation(line):
+    return len(line) - len(line.lstrip(" "))
+
+
+def _slug_value(raw_value):
+    if len(raw_value) >= 2 and raw_value[0] == raw_value[-1] and raw_value[0] in "'\"":
+        return raw_value[1:-1]
+    return raw_value
+
+
+def parse_custom_modes(text):
+    """
+    Splits custom_modes.yaml content into its modes without a YAML library.
+    The file is expected to hold a top-level block-style customModes list
+    whose items are mappings with a slug key, which is the format Roo writes.
+    Returns a dict with 'header' (text before the list), 'leading' (comments
+    before the first item), 'indent' (the list item indentation), 'modes' (a
+    list of (slug, text) pairs, the text dedented to the list indentation)
+    and 'footer' (text after the list), or None if the content does not have
+    that shape.
+    """
+    lines = text.splitlines(keepends=True)
+    for key_index, line in enumerate(lines):
+        if _EMPTY_LIST_PATTERN.match(line.rstrip("\r\n")):
+            return {'header': "".join(lines[:key_index]), 'leading': "", 'indent': 2, 'modes': [], 'footer': "".join(lines[key_index + 1:])}
+        if _LIST_KEY_PATTERN.match(line.rstrip("\r\n")):
+            break
+    else:
+        return None
+
+    header = "".join(lines[:key_index])
+    position = key_index + 1
+    indent = None
+    leading = []
+    blocks = []
+    while position < len(lines):
+        line = lines[position]
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            (blocks[-1] if blocks else leading).append(line)
+            position += 1
+            continue
+        line_indent = _indentation(line)
+        if indent is None:
+            indent = line_indent
+        if line_indent == indent and (stripped == "-" or stripped.startswith("- ")):
+            blocks.append([line])
+        elif line_indent > indent and blocks:
+            blocks[-1].append(line)
+        else:
+            break # The list ended
+        position += 1
+    footer = "".join(lines[position:])
+    if indent is None:
+        indent = 2
+
+    # Blank lines and list-level comments after the last item belong to the
+    # footer. Blank lines between items are dropped so they do not make
+    # otherwise identical modes differ.
+    if blocks:
+        last = blocks[-1]
+        while len(last) > 1 and (not last[-1].strip() or (last[-1].strip().startswith("#") and _indentation(last[-1]) <= indent)):
+            footer = last.pop() + footer
+    for block in blocks:
+        while len(block) > 1 and not block[-1].strip():
+            block.pop()
+
+    modes = []
+    for block in blocks:
+        dedented = [line[min(indent, _indentation(line)):] if line.strip() else "\n" for line in block]
+        first = dedented[0]
+        if first.strip() == "-":
+            # The mapping starts on the next line
+            key_indent = min((_indentation(line) for line in dedented[1:] if line.strip()), default=2)
+        else:
+            key_indent = 1 + len(first[1:]) - len(first[1:].lstrip(" "))
+        candidates = [first[key_indent:]] + [line[key_indent:] for line in dedented[1:] if _indentation(line) == key_indent]
+        slug = None
+        for candidate in candidates:
+            match = _SLUG_PATTERN.match(candidate.rstrip("\r\n"))
+            if match:
+                slug = _slug_value(match.group(1))
+                break
+        if not slug or slug in dict(modes):
+            return None # Modes without a slug, or with duplicate slugs, cannot be merged
+        text = "".join(dedented)
+        if not text.endswith("\n"):
+            text += "\n"
+        modes.append((slug, text))
+    return {'header': header, 'leading': "".join(leading), 'indent': indent, 'modes': modes, 'footer': footer}
+
+
+def render_custom_modes(parsed, modes):
+    """Renders modes, a list of (slug, text) pairs, with the header, footer and indentation of parsed."""
+    if not modes:
+        return parsed['header'] + "customModes: []\n" + parsed['footer']
+    prefix = " " * parsed['indent']
+    body = []
+    for _, text in modes:
+        body.extend(prefix + line if line.strip() else line for line in text.splitlines(keepends=True))
+    return parsed['header'] + "customModes:\n" + parsed['leading'] + "".join(body) + parsed['footer']
+
+
+def _merged_order(parsed_files):
+    """Orders slugs as in the first file, inserting slugs only found in later files after their predecessor."""
+    order = []
+    for parsed in parsed_files:
+        previous = None
+        for slug, _ in parsed['modes']:
+            if slug not in order:
+                order.insert(order.index(previous) + 1 if previous is not None else 0, slug)
+            previous = slug
+    return order
+
+
+def merge_custom_modes(texts, base_text=None):
+    """
+    Merges custom_modes.yaml contents mode by mode, keyed by slug.
+    texts must be ordered from the most recently modified file to the least.
+    base_text is the content from the last synchronization, if known. A mode
+    changed (added, edited or removed) in one file only takes that change. A
+    mode changed differently in several files is a conflict: the version from
+    the most recently modified file wins, except that an edit always wins over
+    a removal. Without a base, modes are combined and differing versions of
+    the same mode are conflicts.
+    Returns (merged text, conflicts), where each conflict is a dict with
+    'slug', 'kept' (index into texts), 'discarded' (a list of (index, mode
+    text) pairs for the losing edits) and 'removed' (indices of the texts
+    that removed the mode), or None if any content cannot be parsed.
+    """
+    parsed_files = [parse_custom_modes(text) for text in texts]
+    if any(parsed is None for parsed in parsed_files):
+        return None
+    base = parse_custom_modes(base_text) if base_text is not None else None
+    base_modes = dict(base['modes']) if base else {}
+    file_modes = [dict(parsed['modes']) for parsed in parsed_files]
+
+    merged = {}
+    conflicts = []
+    for slug in set().union(base_modes, *file_modes):
+        base_version = base_modes.get(slug)
+        changed = [(index, modes.get(slug)) for index, modes in enumerate(file_modes) if modes.get(slug) != base_version]
+        distinct = {version for _, version in changed}
+        if not changed:
+            merged[slug] = base_version
+            continue
+        if len(distinct) == 1:
+            merged[slug] = changed[0][1]
+            continue
+        # Conflict: prefer the newest edit over removals, then the newest file
+        kept_index, kept_version = next(((index, version) for index, version in changed if version is not None), changed[0])
+        merged[slug] = kept_version
+        conflicts.append({
+            'slug': slug,
+            'kept': kept_index,
+            'discarded': [(index, version) for index, version in changed if version != kept_version and version is not None],
+            'removed': [index for index, version in changed if version is None],
+        })
+
+    order = _merged_order(parsed_files)
+    modes = [(slug, merged[slug]) for slug in order if merged.get(slug) is not None]
+    conflicts.sort(key=lambda conflict: order.index(conflict['slug']) if conflict['slug'] in order else len(order))
+    return render_custom_modes(parsed_files[0], modes), conflicts
+
+
+def load_base():
+    """Returns the content of the last synchronization, or None if there is none."""
+    try:
+        return CUSTOM_MODES_BASE_FILE.read_text(encoding='utf-8')
+    except OSError:
+        return None
+
+
+def save_base(content):
+    """Records content as the base of the next merge."""
+    temp_path = CUSTOM_MODES_BASE_FILE.with_name(f".{CUSTOM_MODES_BASE_FILE.name}.{os.getpid()}.tmp")
+    try:
+        CONFIG_DIR.mkdir(parents=True, exist_ok=True)
+        temp_path.write_text(content, encoding='utf-8')
+        os.replace(temp_path, CUSTOM_MODES_BASE_FILE)
+    except OSError as e:
+        print(f"Warning: Could not save the custom modes merge base {CUSTOM_MODES_BASE_FILE}: {e}", file=sys.stderr)
+        try:
+            temp_path.unlink()
+        except OSError:
+            pass
+
+
+def save_conflicts(conflicts, source_names):
+    """
+    Writes the discarded versions of conflicting modes to the conflicts file,
+    as a customModes list that can be copied back by hand. source_names maps
+    each text index to a display name.
+    """
+    lines = ["# Mode versions discarded by the last roo-conf sync-modes merge.\n", "customModes:\n"]
+    for conflict in conflicts:
+        for index, text in conflict['discarded']:
+            lines.append(f"  # '{conflict['slug']}' from {source_names[index]}\n")
+            lines.extend("  " + line if line.strip() else line for line in text.splitlines(keepends=True))
+    CONFIG_DIR.mkdir(parents=True, exist_ok=True)
+    CUSTOM_MODES_CONFLICTS_FILE.write_text("".join(lines), encoding='utf-8')
@@ -1,46 +1,22 @@
 import os
 import pathlib
 import importlib.resources
-import argparse
 import subprocess
-import sys
-import json
 import shutil
-import glob
-import platform
+import re
+import difflib
+from concurrent.futures import ThreadPoolExecutor
 import stat
+import time
+from .paths import TEMPLATES_DIR
+from .config import get_config, set_config, config_batch
+from .template_cache import load_template_cache, save_template_cache, prune_template_cache, get_compiled_template, render_template
 from .settings_manager import manage_vscode_settings_paths, find_vscode_settings_components
-
-CONFIG_DIR = pathlib.Path("~/.config/roo-conf").expanduser()
-CONFIG_FILE = CONFIG_DIR / "config.json"
-TEMPLATES_DIR = CONFIG_DIR / "templates" # This is the directory for remote templates
-
-def get_config():
-    """Reads the configuration file."""
-    if CONFIG_FILE.exists():
-        with open(CONFIG_FILE, 'r') as f:
-            return json.load(f)
-    return {}
-
-def set_config(key, value):
-    """Writes a key-value pair to the configuration file."""
-    CONFIG_DIR.mkdir(parents=True, exist_ok=True)
-    config = get_config()
-    config[key] = value
-    with open(CONFIG_FILE, 'w') as f:
-        json.dump(config, f, indent=4)
-    print(f"Configuration updated: {key} = {value}")
-
-def print_config():
-    """Prints the current configuration."""
-    config = get_config()
-    if config:
-        print("Current configuration:")
-        for key, value in config.items():
-            print(f"  {key}: {value}")
-    else:
-        print("No configuration found.")
-
+from .repos import resolve_repo_paths
+from .custom_modes import CUSTOM_MODES_CONFLICTS_FILE, merge_custom_modes, load_base, save_base, save_conflicts
+from .profiling import span
+from .template_bundle import open_bundle
+from .output_pipeline import OutputPipeline
 
 def list_available_prompts(args):
     """
@@ -73,8 +49,12 @@ def list_available_prompts(args):
     # List from package resources
     # Always list package resources, even if remote is configured, for completeness
     print("From package resources:")
-    package_prompts_dir = importlib.resources.files('roo_conf.prompts')
-    package_files = [item.name for item in package_prompts_dir.iterdir() if item.is_file()]
+    bundle = open_bundle()
+    if bundle is not None:
+        package_files = bundle.names()
+    else:
+        package_prompts_dir = importlib.resources.files('roo_conf.prompts')
+        package_files = [item.name for item in package_prompts_dir.iterdir() if item.is_file()]
     if package_files:
         for file_name in package_files:
             print(f"- {file_name}")
@@ -96,128 +76,427 @@ def get_deployed_path(file_name):
     target_file_path = target_dir / file_name
     return target_file_path
 
-def deploy_prompts(args):
+def _diff_summary(target_file_path, content):
+    """Returns a short '+added -removed lines' summary of the change content would make to a file."""
+    old_lines = target_file_path.read_text(encoding='utf-8', errors='replace').splitlines()
+    added = removed = 0
+    for line in difflib.unified_diff(old_lines, content.splitlines(), lineterm='', n=0):
+        if line.startswith('+') and not line.startswith('+++'):
+            added += 1
+        elif line.startswith('-') and not line.startswith('---'):
+            removed += 1
+    return f"+{added} -{removed} lines"
+
+
+def preview_write(target_file_path, content):
     """
-    Deploys prompt files from the configured source to the .roo directory
-    in the current working directory, optionally filtering by components.
+    Reports what deploying content to target_file_path would do, without
+    writing: a file already holding exactly the same bytes is unchanged,
+    and a diff summary is printed for files that would change.
+    content may be a str or bytes-like data.
+    Returns 'unchanged', 'created' or 'updated'.
     """
-    current_working_dir = pathlib.Path.cwd()
-    target_dir = current_working_dir / ".roo"
+    data = content.encode('utf-8') if isinstance(content, str) else content
+    try:
+        target_size = target_file_path.stat().st_size
+    except FileNotFoundError:
+        target_size = None
+
+    if target_size == len(data) and target_file_path.read_bytes() == data:
+        return 'unchanged'
+
+    if not isinstance(content, str):
+        content = str(content, 'utf-8', errors='replace')
+    if target_size is None:
+        print(f"Would create {target_file_path} ({len(content.splitlines())} lines)")
+        return 'created'
+    print(f"Would update {target_file_path} ({_diff_summary(target_file_path, content)})")
+    return 'updated'
+
+
+def _record_status(status, target_file_path, display_name, dry_run, counts, verbose=True):
+    """Records the outcome of deploying display_name to target_file_path in counts."""
+    if status == 'unchanged':
+        counts['unchanged'] += 1
+        if verbose and not dry_run:
+            print(f"Unchanged {display_name}, skipped writing {target_file_path}")
+    else:
+        counts['written'] += 1
+        if verbose and not dry_run:
+            print(f"Deployed {display_name} to {target_file_path}")
 
-    # Create the target directory if it doesn't exist
-    target_dir.mkdir(exist_ok=True)
 
+def _template_entry(cache, display_name, relative_target_path, source_key, get_stat, read_content):
+    """
+    Builds a template entry for deployment from the compiled template cache.
+    read_content is only called when the cached copy is missing or stale;
+    a read error is recorded on the entry instead of raised.
+    """
+    entry = {
+        'name': str(display_name),
+        'relative_path': relative_target_path,
+        'segments': None,
+        'data': None,
+        'error': None,
+    }
+    # Replace the placeholder (only if it's a text file, assuming .md for now)
+    substitute = pathlib.Path(relative_target_path).suffix == '.md'
+    try:
+        with span("deploy.parse", file=display_name):
+            entry['segments'] = get_compiled_template(cache, source_key, get_stat(), read_content, substitute)
+    except Exception as e:
+        entry['error'] = e
+    return entry
+
+
+def _bundle_entry(bundle, name):
+    """
+    Builds a template entry for a file of the package template bundle.
+    Files without placeholders keep their bytes as a memoryview into the
+    bundle in 'data' and are written without being decoded.
+    """
+    segments = bundle.segments(name)
+    return {
+        'name': name,
+        'relative_path': name,
+        'segments': segments,
+        'data': bundle.read(name) if segments is None else None,
+        'error': None,
+    }
+
+
+def _list_template_files(source_base_dir):
+    """
+    Lists the files under source_base_dir as sorted paths relative to it,
+    with / as separator. The .git directory is not descended into.
+    Symbolic links to directories are followed, as glob.glob does, except
+    links back to a directory above them, which would never end.
+    """
+    files = []
+    # (device, inode) of each walked directory and of the directories above it, by path
+    ancestors = {}
+    for root, dirs, names in os.walk(source_base_dir, followlinks=True):
+        try:
+            root_stat = os.stat(root)
+        except OSError:
+            dirs[:] = []
+            continue
+        chain = ancestors.pop(root, frozenset()) | {(root_stat.st_dev, root_stat.st_ino)}
+        kept = []
+        for name in dirs:
+            if name == '.git':
+                continue
+            path = os.path.join(root, name)
+            try:
+                directory_stat = os.stat(path)
+            except OSError:
+                continue
+            if (directory_stat.st_dev, directory_stat.st_ino) not in chain:
+                ancestors[path] = chain
+                kept.append(name)
+        dirs[:] = kept
+        relative_root = pathlib.Path(root).relative_to(source_base_dir).as_posix()
+        prefix = "" if relative_root == "." else relative_root + "/"
+        files.extend(prefix + name for name in names)
+    files.sort()
+    return files
+
+
+def _translate_glob_segment(segment):
+    """Translates one path segment of a glob pattern to a regular expression that stays within the segment."""
+    parts = []
+    i, n = 0, len(segment)
+    while i < n:
+        c = segment[i]
+        i += 1
+        if c == '*':
+            if not parts or parts[-1] != '[^/]*':
+                parts.append('[^/]*')
+        elif c == '?':
+            parts.append('[^/]')
+        elif c == '[':
+            j = i
+            if j < n and segment[j] == '!':
+                j += 1
+            if j < n and segment[j] == ']':
+                j += 1
+            j = segment.find(']', j)
+            if j == -1:
+                parts.append('\\[')
+                continue
+            characters = re.sub(r'([\\\[\]&~|])', r'\\\1', segment[i:j])
+            i = j + 1
+            if characters.startswith('!'):
+                characters = '^/' + characters[1:]
+            elif characters.startswith('^'):
+                characters = '\\' + characters
+            parts.append(f'[{characters}]')
+        else:
+            parts.append(re.escape(c))
+    return ''.join(parts)
+
+
+def _compile_component_patterns(components):
+    """
+    Compiles component glob patterns into a single matcher for relative
+    template paths, following glob.glob(recursive=True): * and ? match
+    within a path segment, a ** segment matches any number of directories,
+    and wildcards do not match names starting with a dot.
+    Returns a function telling whether a relative path matches any pattern.
+    """
+    alternatives = []
+    for component in components:
+        component = component.replace(os.sep, '/')
+        segments = [segment for segment in component.split('/') if segment]
+        regex = ''
+        for position, segment in enumerate(segments):
+            last = position == len(segments) - 1
+            if segment == '**':
+                regex += r'(?!\.)[^/]*(?:/(?!\.)[^/]+)*' if last else r'(?:(?!\.)[^/]+/)*'
+                continue
+            if not segment.startswith('.'):
+                regex += r'(?!\.)'
+            regex += _translate_glob_segment(segment)
+            if not last:
+                regex += '/'
+        if component.endswith('/'):
+            regex += '/' # Only directories match, and only files are listed
+        alternatives.append(f'(?:{regex})')
+    flags = re.IGNORECASE if os.path.normcase('A') == 'a' else 0
+    return re.compile('|'.join(alternatives), flags).fullmatch
+
+
+def load_templates(components):
+    """
+    Loads the template files selected by components from the configured source,
+    once, so they can be rendered for any number of repositories.
+    Returns a list of template entries (see _template_entry).
+    """
     config = get_config()
     template_source_repo = config.get('template_source_repo')
 
     # Always include default system prompts
     default_prompts = ["system-prompt-architect-gh.md", "system-prompt-code-gh.md"]
-    components = args.components if args.components else []
-
-    print(f"Deploying components: {components if components else 'all'}")
+    templates = []
+    with span("deploy.template_cache"):
+        cache = load_template_cache()
 
     if template_source_repo and TEMPLATES_DIR.exists():
         print("Using remote template source.")
         source_base_dir = TEMPLATES_DIR
-        all_source_files = [pathlib.Path(root) / file for root, _, files in os.walk(source_base_dir) for file in files]
-
-        files_to_deploy = []
-        if components:
-            for component in components:
-                # Treat component as a glob pattern relative to the source_base_dir
-                pattern = str(source_base_dir / component)
-                files_to_deploy.extend(glob.glob(pattern, recursive=True))
-        else:
-            # If no components specified, deploy all files from the remote source
-            files_to_deploy = [str(f) for f in all_source_files]
-
-        # Add default prompts if they are not already included and exist in the source
-        for default_prompt in default_prompts:
-            default_path = source_base_dir / default_prompt
-            if default_path.exists() and str(default_path) not in files_to_deploy:
-                 files_to_deploy.append(str(default_path))
-
-
-        for source_file_path_str in files_to_deploy:
-            source_path = pathlib.Path(source_file_path_str)
+        with span("discovery.templates", source=source_base_dir):
+            # The source tree is listed once; components are matched against the listing
+            all_source_files = _list_template_files(source_base_dir)
+
+            if components:
+                # Treat components as glob patterns relative to the source_base_dir
+                matcher = _compile_component_patterns(components)
+                files_to_deploy = [file for file in all_source_files if matcher(file)]
+            else:
+                # If no components specified, deploy all files from the remote source
+                files_to_deploy = list(all_source_files)
+
+            # Add default prompts if they are not already included and exist in the source
+            available_files = set(all_source_files)
+            selected_files = set(files_to_deploy)
+            for default_prompt in default_prompts:
+                if default_prompt in available_files and default_prompt not in selected_files:
+                    files_to_deploy.append(default_prompt)
+                    selected_files.add(default_prompt)
+        # Every file of the source stays cached, so deploying a few components does not evict the others
+        source_keys = {str(source_base_dir / file) for file in all_source_files}
+
+        for relative_file in files_to_deploy:
+            source_path = source_base_dir / relative_file
             if not source_path.is_file():
-                continue # Skip directories or non-files from glob results
-
-            relative_target_path = source_path.relative_to(source_base_dir)
-            target_file_path = target_dir / relative_target_path
+                continue # Skip broken links and other non-files
 
-            # Ensure target subdirectory exists
-            target_file_path.parent.mkdir(parents=True, exist_ok=True)
-
-            try:
-                content = source_path.read_text()
-
-                # Replace the placeholder (only if it's a text file, assuming .md for now)
-                if source_path.suffix == '.md':
-                     updated_content = content.replace('{{repo-full-path}}', str(current_working_dir))
-                else:
-                     updated_content = content
-
-                # Write the updated content to the target file
-                with open(target_file_path, 'w') as f:
-                    f.write(updated_content)
-
-                print(f"Deployed {relative_target_path} to {target_file_path}")
-
-            except Exception as e:
-                print(f"Error deploying {relative_target_path}: {e}")
+            relative_target_path = pathlib.Path(relative_file)
+            templates.append(_template_entry(
+                cache, relative_target_path, relative_target_path,
+                str(source_path), source_path.stat, source_path.read_text,
+            ))
 
     else:
         print("Using package template source.")
-        source_dir = importlib.resources.files('roo_conf.prompts')
-        all_package_files = [item for item in source_dir.iterdir() if item.is_file()]
+        with span("discovery.templates", source="package"):
+            # The prebuilt bundle holds every package prompt; the files are only listed without it
+            bundle = open_bundle()
+            if bundle is not None:
+                package_files = dict.fromkeys(bundle.names())
+            else:
+                source_dir = importlib.resources.files('roo_conf.prompts')
+                package_files = {item.name: item for item in source_dir.iterdir() if item.is_file()}
+        # Files read from the bundle are not cached
+        source_keys = set() if bundle is not None else {f"package:{resource}" for resource in package_files.values()}
 
         files_to_deploy = []
         if components:
              # For package resources, components must match file names exactly for now
              # Glob patterns are not supported for package resources with this approach
-             available_package_files = [item.name for item in all_package_files]
              for component in components:
-                 if component in available_package_files:
+                 if component in package_files:
                      files_to_deploy.append(component)
                  else:
                      print(f"Warning: Component '{component}' not found in package resources.")
         else:
             # If no components specified, deploy all files from the package
-            files_to_deploy = [item.name for item in all_package_files]
+            files_to_deploy = list(package_files)
 
         # Always include default prompts if they are not already included
         for default_prompt in default_prompts:
             if default_prompt not in files_to_deploy:
                  # Check if the default prompt exists in the package resources
-                 try:
-                     importlib.resources.read_text('roo_conf.prompts', default_prompt)
+                 if default_prompt in package_files:
                      files_to_deploy.append(default_prompt)
-                 except FileNotFoundError:
+                 else:
                      print(f"Warning: Default prompt '{default_prompt}' not found in package resources.")
 
 
         for source_filename in files_to_deploy:
-            target_filename = source_filename
-            target_file_path = target_dir / target_filename
+            if bundle is not None:
+                templates.append(_bundle_entry(bundle, source_filename))
+                continue
+            resource = package_files[source_filename]
+            # Resources inside a zip archive cannot be stat'ed and are always read
+            get_stat = resource.stat if isinstance(resource, pathlib.Path) else lambda: None
+            templates.append(_template_entry(
+                cache, source_filename, source_filename,
+                f"package:{resource}", get_stat, lambda resource=resource: resource.read_text(encoding='utf-8'),
+            ))
+
+    with span("deploy.template_cache"):
+        prune_template_cache(cache, source_keys)
+        save_template_cache(cache)
+    return templates
+
+
+def deploy_to_repo(repo_dir, templates, dry_run=False, verbose=True, pipeline=None):
+    """
+    Renders the loaded templates for repo_dir, substituting its path for the
+    {{repo-full-path}} placeholder, and deploys them to its .roo directory.
+    Files are written through pipeline, which may be shared by several
+    repositories; a pipeline is created for this call if none is given.
+    Files whose rendered content already matches the target are not rewritten.
+    Returns (counts, errors) with written/unchanged/failed counts and error messages.
+    """
+    if pipeline is None and not dry_run:
+        with OutputPipeline() as pipeline:
+            return deploy_to_repo(repo_dir, templates, dry_run, verbose, pipeline)
 
-            try:
-                content = importlib.resources.read_text('roo_conf.prompts', source_filename)
+    target_dir = repo_dir / ".roo"
+    placeholder_values = {'repo-full-path': str(repo_dir)}
+    counts = {'written': 0, 'unchanged': 0, 'failed': 0}
+    errors = []
+    pending_writes = []
 
-                # Replace the placeholder (only if it's a text file, assuming .md for now)
-                if pathlib.Path(source_filename).suffix == '.md':
-                    updated_content = content.replace('{{repo-full-path}}', str(current_working_dir))
-                else:
-                    updated_content = content
+    # Create the target directory if it doesn't exist
+    if not dry_run:
+        try:
+            pipeline.ensure_directories([target_dir])
+        except OSError as e:
+            counts['failed'] = len(templates)
+            errors.append(f"Error creating {target_dir}: {e}")
+            return counts, errors
 
-                # Write the updated content to the target file
-                with open(target_file_path, 'w') as f:
-                    f.write(updated_content)
+    for template in templates:
+        try:
+            if template['error'] is not None:
+                raise template['error']
 
-                print(f"Deployed {source_filename} to {target_file_path}")
+            if template['data'] is not None:
+                updated_content = template['data']
+            else:
+                with span("deploy.render", file=template['name']):
+                    updated_content = render_template(template['segments'], placeholder_values)
 
-            except Exception as e:
-                print(f"Error deploying {source_filename}: {e}")
+            # Write the updated content to the target file if it changed
+            target_file_path = target_dir / template['relative_path']
+            if dry_run:
+                _record_status(preview_write(target_file_path, updated_content), target_file_path, template['name'], dry_run, counts, verbose)
+            else:
+                future = pipeline.submit(target_file_path, updated_content, skip_unchanged=True)
+                pending_writes.append((template['name'], target_file_path, future))
+
+        except Exception as e:
+            counts['failed'] += 1
+            errors.append(f"Error deploying {template['name']}: {e}")
+            if verbose:
+                print(errors[-1])
+
+    # Outcomes are reported in template order, whichever write finishes first
+    for display_name, target_file_path, future in pending_writes:
+        try:
+            _record_status(future.result(), target_file_path, display_name, dry_run, counts, verbose)
+        except Exception as e:
+            counts['failed'] += 1
+            errors.append(f"Error deploying {display_name}: {e}")
+            if verbose:
+                print(errors[-1])
+
+    return counts, errors
+
+
+def _format_counts(counts, dry_run):
+    if dry_run:
+        return f"{counts['written']} would be written, {counts['unchanged']} unchanged, {counts['failed']} failed"
+    return f"{counts['written']} written, {counts['unchanged']} unchanged, {counts['failed']} failed"
+
+
+def deploy_prompts(args):
+    """
+    Deploys prompt files from the configured source to the .roo directory
+    in the current working directory, optionally filtering by components.
+    With --repos, the templates are loaded once and deployed concurrently to
+    every listed repository instead, followed by a per-repository summary.
+    Files whose rendered content already matches the target are not rewritten.
+    """
+    dry_run = args.dry_run
+    components = args.components if args.components else []
+
+    print(f"Deploying components: {components if components else 'all'}")
+    templates = load_templates(components)
+
+    if not args.repos:
+        if dry_run:
+            counts, _ = deploy_to_repo(pathlib.Path.cwd(), templates, dry_run)
+            print(f"Dry run: {_format_counts(counts, dry_run)}.")
+            return
+        with OutputPipeline() as pipeline:
+            counts, _ = deploy_to_repo(pathlib.Path.cwd(), templates, dry_run, pipeline=pipeline)
+        print(f"Deployment finished: {_format_counts(counts, dry_run)}.")
+        print(pipeline.summary())
+        return
+
+    with span("discovery.repos"):
+        repo_dirs = resolve_repo_paths(args.repos)
+    if not repo_dirs:
+        print("No repositories to deploy to.")
+        return
+
+    print(f"Deploying {len(templates)} files to {len(repo_dirs)} repositories.")
+    totals = {'written': 0, 'unchanged': 0, 'failed': 0}
+    failed_repos = 0
+    max_workers = args.jobs if args.jobs and args.jobs > 0 else None
+    # One write pipeline serves every repository
+    pipeline = None if dry_run else OutputPipeline()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # map() yields results in input order, so the summary is deterministic
+        results = executor.map(lambda repo_dir: deploy_to_repo(repo_dir, templates, dry_run, verbose=False, pipeline=pipeline), repo_dirs)
+        for repo_dir, (counts, errors) in zip(repo_dirs, results):
+            print(f"{repo_dir}: {_format_counts(counts, dry_run)}")
+            for error in errors:
+                print(f"  - {error}")
+            for key in totals:
+                totals[key] += counts[key]
+            if counts['failed']:
+                failed_repos += 1
+
+    prefix = "Dry run" if dry_run else "Deployment finished"
+    print(f"{prefix} for {len(repo_dirs)} repositories ({failed_repos} with failures): {_format_counts(totals, dry_run)}.")
+    if pipeline is not None:
+        pipeline.close()
+        print(pipeline.summary())
 
 
 def get_source_path(file_name):
@@ -269,9 +548,94 @@ def edit_prompt(args):
         print(f"Error opening file with editor: {e}")
 
 
+def _directory_size(path):
+    """Returns the total size in bytes of the files under path."""
+    total = 0
+    for root, _, files in os.walk(path):
+        for file in files:
+            try:
+                total += os.lstat(os.path.join(root, file)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def _is_usable_checkout(checkout_dir, template_source_repo):
+    """Checks that checkout_dir is a Git work tree cloned from template_source_repo."""
+    if not (checkout_dir / ".git").is_dir():
+        return False
+    try:
+        result = subprocess.run(
+            ["git", "-C", str(checkout_dir), "remote", "get-url", "origin"],
+            capture_output=True, text=True,
+        )
+    except OSError:
+        return False
+    return result.returncode == 0 and result.stdout.strip() == template_source_repo
+
+
+def _is_versioned_checkout(path):
+    """Checks path is a checkout directory created by _clone_and_swap, which may be removed once replaced."""
+    return path.parent == TEMPLATES_DIR.parent and path.name.startswith(f".{TEMPLATES_DIR.name}-checkout-")
+
+
+def _clone_and_swap(template_source_repo):
+    """
+    Clones the template repository into a new checkout directory next to
+    TEMPLATES_DIR, then points TEMPLATES_DIR, a symlink, at it with a single
+    os.replace. A concurrent deploy sees either the old or the new checkout,
+    never a missing templates directory. The replaced checkout is removed.
+    """
+    checkout_dir = TEMPLATES_DIR.with_name(f".{TEMPLATES_DIR.name}-checkout-{time.time_ns()}-{os.getpid()}")
+    link_path = TEMPLATES_DIR.with_name(f".{TEMPLATES_DIR.name}-link-{os.getpid()}")
+    checkout_dir.parent.mkdir(parents=True, exist_ok=True)
+
+    print(f"Cloning repository {template_source_repo} into {TEMPLATES_DIR}")
+    try:
+        subprocess.run(
+            ["git", "clone", "--depth", "1", template_source_repo, str(checkout_dir)],
+            check=True
+        )
+    except Exception:
+        shutil.rmtree(checkout_dir, ignore_errors=True)
+        raise
+    transferred = _directory_size(checkout_dir / ".git")
+
+    try:
+        link_path.unlink(missing_ok=True)
+        os.symlink(checkout_dir.name, link_path, target_is_directory=True)
+    except (OSError, NotImplementedError):
+        # No symlinks (Windows without the privilege to create them): swap the directories instead
+        old_dir = TEMPLATES_DIR.with_name(f".{TEMPLATES_DIR.name}-old-{os.getpid()}")
+        if TEMPLATES_DIR.exists():
+            os.replace(TEMPLATES_DIR, old_dir)
+        os.replace(checkout_dir, TEMPLATES_DIR)
+        shutil.rmtree(old_dir, ignore_errors=True)
+        print("Repository cloned successfully.")
+        return transferred
+
+    previous_dir = None
+    if TEMPLATES_DIR.is_symlink():
+        previous_dir = TEMPLATES_DIR.resolve()
+    elif TEMPLATES_DIR.exists():
+        # A plain directory from an older version cannot be replaced by a link
+        # in one step; it is moved aside first, which only happens once
+        previous_dir = TEMPLATES_DIR.with_name(f".{TEMPLATES_DIR.name}-checkout-old-{os.getpid()}")
+        os.replace(TEMPLATES_DIR, previous_dir)
+    os.replace(link_path, TEMPLATES_DIR)
+    if previous_dir is not None and _is_versioned_checkout(previous_dir):
+        shutil.rmtree(previous_dir, ignore_errors=True)
+    print("Repository cloned successfully.")
+    return transferred
+
+
 def pull_templates(args):
     """
     Pulls prompt templates from the configured remote Git repository.
+    An existing checkout of the same repository is updated in place with a
+    fast-forward pull. A fresh clone is only made when there is no usable
+    checkout; it is built in a new directory, and the TEMPLATES_DIR
+    symlink is switched over to it in one step.
     """
     config = get_config()
     template_source_repo = config.get('template_source_repo')
@@ -280,44 +644,58 @@ def pull_templates(args):
         print("No remote template source repository configured. Use 'roo-conf config template_source_repo <repo_url>' to set it.")
         return
 
-    if TEMPLATES_DIR.exists():
-        print(f"Templates directory {TEMPLATES_DIR} already exists. Removing and re-cloning.")
-        try:
-            shutil.rmtree(TEMPLATES_DIR)
-            print("Existing templates directory removed.")
-        except OSError as e:
-            print(f"Error removing existing templates directory: {e}")
-            return
-
-    print(f"Cloning repository {template_source_repo} into {TEMPLATES_DIR}")
+    start_time = time.perf_counter()
     try:
-        subprocess.run(
-            ["git", "clone", "--depth", "1", template_source_repo, str(TEMPLATES_DIR)],
-            check=True
-        )
-        print("Repository cloned successfully.")
+        transferred = None
+        if _is_usable_checkout(TEMPLATES_DIR, template_source_repo):
+            print(f"Updating templates in {TEMPLATES_DIR} from {template_source_repo}")
+            objects_dir = TEMPLATES_DIR / ".git" / "objects"
+            size_before = _directory_size(objects_dir)
+            result = subprocess.run(["git", "-C", str(TEMPLATES_DIR), "pull", "--ff-only"])
+            if result.returncode == 0:
+                transferred = max(0, _directory_size(objects_dir) - size_before)
+                print("Templates updated successfully.")
+            else:
+                print("Could not fast-forward the existing templates checkout. Re-cloning.")
+        elif TEMPLATES_DIR.exists():
+            print(f"Templates directory {TEMPLATES_DIR} is not a usable checkout of {template_source_repo}. Re-cloning.")
+
+        if transferred is None:
+            transferred = _clone_and_swap(template_source_repo)
     except subprocess.CalledProcessError as e:
         print(f"Error cloning repository: {e}")
+        return
     except FileNotFoundError:
-         print("Error: git command not found. Please ensure Git is installed and in your PATH.")
+        print("Error: git command not found. Please ensure Git is installed and in your PATH.")
+        return
+    except OSError as e:
+        print(f"Error replacing templates directory: {e}")
+        return
 
+    elapsed = time.perf_counter() - start_time
+    print(f"Transferred about {transferred / 1024:.1f} KiB in {elapsed:.2f}s.")
 
-def sync_modes(args):
+
+def _sync_custom_modes():
     """
     Synchronizes custom_modes.yaml files between VS Code and VS Code Insiders.
     Finds and stores paths in the configuration file if not already present.
     Handles cases where the file exists in one or both locations.
     Copies the latest file to the remote templates directory.
+    Returns the settings file paths that were considered.
     """
     print("Synchronizing custom modes...")
     # Get all potential paths and existing files
-    all_potential_components = find_vscode_settings_components()
-    existing_files = manage_vscode_settings_paths(get_config, set_config)
+    with span("discovery.settings"):
+        all_potential_components = find_vscode_settings_components()
+        # Settings path discovery may store several keys; write them back once
+        with config_batch():
+            existing_files = manage_vscode_settings_paths(get_config, set_config)
     existing_file_paths_str = [str(f) for f in existing_files]
 
     if not all_potential_components:
         print("Could not determine potential VS Code settings paths.")
-        return
+        return []
 
     potential_paths_str = [str(pathlib.Path(item['parent_path']) / item['relative_path']) for item in all_potential_components]
 
@@ -329,7 +707,7 @@ def sync_modes(args):
              print("Settings directories found, but no custom_modes.yaml files exist yet. No synchronization needed at this time.")
         else:
              print("Could not find settings directories for VS Code or VS Code Insiders.")
-        return
+        return existing_files
 
     elif len(existing_files) == 1:
         print("Found custom_modes.yaml in only one location.")
@@ -359,7 +737,7 @@ def sync_modes(args):
              print("Could not determine the missing settings path.")
 
     elif len(existing_files) == 2:
-        print("Found custom_modes.yaml in both locations. Synchronizing based on latest modification time.")
+        print("Found custom_modes.yaml in both locations. Merging modes by slug.")
         latest_file = None
         latest_mtime = 0
 
@@ -376,30 +754,61 @@ def sync_modes(args):
 
         if not latest_file:
             print("Could not determine the latest custom_modes.yaml file from existing files.")
-            return
+            return existing_files
 
         print(f"Latest custom_modes.yaml found: {latest_file}")
 
-        try:
-            latest_content = latest_file.read_text()
-        except Exception as e:
-            print(f"Error reading latest file {latest_file}: {e}")
-            return
+        contents = {}
+        for file_path in existing_files:
+            try:
+                with span("sync.read", file=file_path):
+                    contents[file_path] = file_path.read_text()
+            except Exception as e:
+                print(f"Error reading file {file_path}: {e}")
+                return existing_files
+
+        # Merge against the content of the last synchronization, newest file first
+        ordered_files = [latest_file] + [file_path for file_path in existing_files if file_path != latest_file]
+        with span("sync.merge"):
+            merge_result = merge_custom_modes([contents[file_path] for file_path in ordered_files], load_base())
+        if merge_result is None:
+            print("Warning: Could not parse custom_modes.yaml as a list of modes. Using the latest file as is.")
+            merged_content, conflicts = contents[latest_file], []
+        else:
+            merged_content, conflicts = merge_result
+
+        for conflict in conflicts:
+            kept_from = ordered_files[conflict['kept']]
+            if conflict['discarded']:
+                print(f"Conflict: mode '{conflict['slug']}' was changed in both files. Kept the version from {kept_from}.")
+            else:
+                print(f"Conflict: mode '{conflict['slug']}' was removed in one file and changed in the other. Kept the version from {kept_from}.")
+        if any(conflict['discarded'] for conflict in conflicts):
+            try:
+                save_conflicts(conflicts, [str(file_path) for file_path in ordered_files])
+                print(f"Discarded versions of conflicting modes were saved to {CUSTOM_MODES_CONFLICTS_FILE}")
+            except OSError as e:
+                print(f"Error saving conflicting modes to {CUSTOM_MODES_CONFLICTS_FILE}: {e}")
 
-        # Copy the content to the other existing file
+        # Write the merged content to the files it changes
+        all_written = True
         for file_path in existing_files:
-            if file_path != latest_file:
+            if contents[file_path] == merged_content:
+                print(f"{file_path} is up to date.")
+            else:
                 original_permissions = None
                 try:
                     # Store original permissions and make the file writable
                     original_permissions = file_path.stat().st_mode
                     os.chmod(file_path, original_permissions | stat.S_IWRITE)
 
-                    file_path.write_text(latest_content)
-                    print(f"Copied content to {file_path}")
+                    with span("sync.write", file=file_path):
+                        file_path.write_text(merged_content)
+                    print(f"Wrote merged modes to {file_path}")
 
                 except Exception as e:
                     print(f"Error writing to file {file_path}: {e}")
+                    all_written = False
                 finally:
                     # Restore original permissions if they were changed
                     if original_permissions is not None:
@@ -407,11 +816,14 @@ def sync_modes(args):
                             os.chmod(file_path, original_permissions)
                         except Exception as e:
                             print(f"Error restoring permissions for {file_path}: {e}")
+        # A file left behind would look like an edit against a newer base
+        if all_written:
+            save_base(merged_content)
         print("Synchronization complete.")
 
     else:
         print(f"Unexpected number of custom_modes.yaml files found: {len(existing_files)}. Expected 0, 1, or 2.")
-        return
+        return existing_files
 
 
     # Copy the latest file (or the single existing file) to the remote templates directory
@@ -426,6 +838,7 @@ def sync_modes(args):
 
     if source_for_remote:
         target_remote_template_file = TEMPLATES_DIR / "custom_modes.yaml"
+        original_permissions = None
 
         try:
             # Ensure the target directory exists
@@ -441,7 +854,8 @@ def sync_modes(args):
                      print(f"Warning: Could not change permissions for {target_remote_template_file}: {e}")
 
 
-            shutil.copy2(source_for_remote, target_remote_template_file)
+            with span("sync.write", file=target_remote_template_file):
+                shutil.copy2(source_for_remote, target_remote_template_file)
             print(f"Copied custom_modes.yaml to remote templates directory: {target_remote_template_file}")
 
             # Restore original permissions if they were changed
@@ -457,59 +871,63 @@ def sync_modes(args):
     else:
         print("No custom_modes.yaml file found to copy to the remote templates directory.")
 
+    return existing_files
 
-def main():
-    parser = argparse.ArgumentParser(description="Manage roo-conf prompts and settings.")
-    subparsers = parser.add_subparsers(dest="command", help="Available commands")
-
-    # Deploy command
-    deploy_parser = subparsers.add_parser("deploy", help="Deploy prompt files to the .roo directory.")
-    deploy_parser.add_argument(
-        "components",
-        nargs="*", # 0 or more arguments
-        help="Optional list of components (e.g., cdk, typescript) or glob patterns to deploy."
-    )
-    deploy_parser.set_defaults(func=deploy_prompts)
-
-    # Edit command
-    edit_parser = subparsers.add_parser("edit", help="Edit a source template file.")
-    edit_parser.add_argument(
-        "file_name",
-        nargs="?", # Makes the argument optional
-        help="Name of the template file to edit."
-    )
-    edit_parser.set_defaults(func=edit_prompt)
-
-    # Config command
-    config_parser = subparsers.add_parser("config", help="Configure roo-conf settings.")
-    config_parser.add_argument(
-        "key",
-        nargs="?", # Make key optional
-        help="Configuration key (e.g., 'editor', 'template_source_repo')."
-    )
-    config_parser.add_argument(
-        "value",
-        nargs="?", # Make value optional
-        help="Configuration value."
-    )
-    config_parser.set_defaults(func=lambda args: set_config(args.key, args.value) if args.key and args.value is not None else print_config())
 
-    # Pull command
-    pull_parser = subparsers.add_parser("pull", help="Pull prompt templates from the configured remote repository.")
-    pull_parser.set_defaults(func=pull_templates)
+def _file_digests(paths):
+    """Returns {path: SHA-256 hex digest, or None if the file cannot be read}."""
+    import hashlib
+    digests = {}
+    for path in paths:
+        try:
+            digests[path] = hashlib.sha256(path.read_bytes()).hexdigest()
+        except OSError:
+            digests[path] = None
+    return digests
 
-    # Sync Modes command
-    sync_modes_parser = subparsers.add_parser("sync-modes", help="Synchronize custom_modes.yaml between VS Code and VS Code Insiders.")
-    sync_modes_parser.set_defaults(func=sync_modes)
 
+def sync_modes(args):
+    """
+    Synchronizes custom_modes.yaml between VS Code and VS Code Insiders and
+    the remote templates directory. With --watch, keeps running and
+    synchronizes again whenever one of the settings files changes.
+    """
+    settings_files = _sync_custom_modes()
+    if not getattr(args, 'watch', False):
+        return
 
-    args = parser.parse_args()
+    # Parent directories must exist to be watched; a missing file is picked up once it is created
+    watched_files = [path for path in settings_files if path.parent.is_dir()]
+    if not watched_files:
+        print("No settings directories to watch.")
+        return
 
-    if hasattr(args, 'func'):
-        args.func(args)
-    else:
-        parser.print_help()
+    from .watch import watch_files
+
+    # Our own copies change the watched files too. They leave every file with
+    # the content recorded after the last sync, so such events are ignored.
+    last_synced = _file_digests(watched_files)
+
+    def on_change():
+        nonlocal last_synced
+        if _file_digests(watched_files) == last_synced:
+            return
+        print(f"\n[{time.strftime('%H:%M:%S')}] Change detected in custom_modes.yaml.")
+        _sync_custom_modes()
+        last_synced = _file_digests(watched_files)
+
+    watch_files(
+        watched_files, on_change,
+        debounce=args.debounce / 1000,
+        poll_interval=args.poll_interval / 1000,
+        force_polling=args.polling,
+    )
+
+
+def main():
+    from .cli import main as cli_main
+    cli_main()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,791 @@
+import json
+import heapq
+import bisect
+import sqlite3
+import itertools
+import operator
+import collections
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import sys
+
+from .global_state import iter_task_history
+from .storage_index import find_global_state_file
+from .conversation_manifest import load_manifest, save_manifest, read_sources
+from .search_index import open_search_index, indexed_task_ids, replace_task, remove_tasks, collect_rows, normalize_timestamp
+from .repos import resolve_repo_paths
+from .conversation_export import EXPORT_MANIFEST_SUFFIX, message_rows, rows_digest, open_export
+from .profiling import span, is_enabled, origin, enable, drain_events, add_events
+from .output_pipeline import OutputPipeline, StagedFile
+from .conversation_store import ConversationStore
+from .conversation_codecs import COMPRESSION_SUFFIXES, BlockWriter, codec_available
+
+
+def _read_task_history(global_state_file, errors_encountered):
+    """
+    Streams task history items from the global state file, recording a read
+    or parse error in errors_encountered instead of raising it.
+    """
+    try:
+        yield from iter_task_history(global_state_file)
+    except FileNotFoundError:
+        # This should ideally not happen after finding the file, but included for robustness
+        errors_encountered.append(f"Error: Global state file not found at {global_state_file}")
+    except json.JSONDecodeError:
+        errors_encountered.append(f"Error: Could not parse JSON from global state file at {global_state_file}. File might be corrupted or in an unexpected format.")
+    except Exception as e:
+        errors_encountered.append(f"An unexpected error occurred while reading global state file {global_state_file}: {e}")
+
+def _outputs_exist(previous_entry, filename, options, output_dir):
+    """Checks the files recorded in previous_entry were rendered as filename with options and still exist."""
+    if previous_entry.get('output') != filename or previous_entry.get('options') != options:
+        return False
+    names = [filename] + [part.get('output') for part in previous_entry.get('parts', ())]
+    return all(isinstance(name, str) and (output_dir / name).exists() for name in names)
+
+def _extract_task(task_id, conversation_dir, output_dir, previous_entry=None, index_missing=False, options=None):
+    """
+    Converts the conversation files of a single task to Markdown for a file
+    in output_dir, or for part files and an index page with the chunking
+    options, compressed with the compress option. Runs in a worker process
+    when --jobs is above 1. The Markdown is streamed to temporary files next
+    to its destinations (see StagedFile), which the caller moves into place.
+    The task is skipped when its source files match previous_entry from the
+    extraction manifest, it was rendered with the same options and its
+    output files still exist.
+    Returns an (output_path, sources, unchanged, error, rows, files) tuple;
+    on failure only error is set. rows holds the search index rows of the
+    rendered messages, and is set when the task was converted or when
+    index_missing is set. files lists (path, temporary path, SHA-256 hex
+    digest, size) for the files to move into place, output_path first, when
+    the task was converted.
+    """
+    options = options or {}
+    api_history_path = conversation_dir / "api_conversation_history.json"
+    ui_messages_path = conversation_dir / "ui_messages.json"
+
+    if not api_history_path.exists():
+        return None, None, False, f"Skipping task {task_id}: API history file not found at {api_history_path}", None, None
+    if not ui_messages_path.exists():
+        return None, None, False, f"Skipping task {task_id}: UI messages file not found at {ui_messages_path}", None, None
+
+    # Generate a simple filename for now, can improve later
+    # Ensure filename is safe
+    safe_task_id = "".join(c for c in str(task_id) if c.isalnum() or c in ('-', '_')).rstrip()
+    if not safe_task_id:
+         safe_task_id = "unknown_task"
+
+    codec = options.get('compress')
+    suffix = COMPRESSION_SUFFIXES[codec] if codec else ""
+    filename = f"conversation_{safe_task_id}.md{suffix}"
+    output_path = output_dir / filename
+
+    try:
+        source_paths = {api_history_path.name: api_history_path, ui_messages_path.name: ui_messages_path}
+        with span("extract.read", task=task_id):
+            sources, contents, unchanged = read_sources(source_paths, previous_entry)
+        skip_output = unchanged and _outputs_exist(previous_entry, filename, options or None, output_dir)
+        if skip_output and not index_missing:
+            return output_path, sources, True, None, None, None
+
+        with span("extract.parse", task=task_id):
+            api_history = json.loads(contents.get(api_history_path.name) or api_history_path.read_bytes())
+            ui_messages = json.loads(contents.get(ui_messages_path.name) or ui_messages_path.read_bytes())
+
+        rows = []
+        # Index rows are collected in the same pass that renders the Markdown
+        selected = _select_messages(api_history, ui_messages, options.get('since'), options.get('until'), options.get('last'))
+        messages = collect_rows(selected, rows)
+        if skip_output:
+            # Only the search index lacks this task; the Markdown is up to date
+            with span("extract.convert", task=task_id):
+                for _ in messages:
+                    pass
+            return output_path, sources, True, None, rows, None
+
+        with span("extract.render", task=task_id):
+            if options.get('chunk_messages') or options.get('chunk_size'):
+                files = _write_chunked(output_dir / f"conversation_{safe_task_id}.md", messages, options.get('chunk_messages'), options.get('chunk_size'), suffix, codec)
+            else:
+                # Written, and compressed, as it is rendered, without joining the whole document first
+                files = [_write_staged(output_path, _render_markdown(messages), codec)]
+        return output_path, sources, False, None, rows, files
+
+    except FileNotFoundError:
+        # This should ideally not happen due to the exists() check, but included for robustness
+        return None, None, False, f"Error: Conversation files not found for task {task_id}", None, None
+    except json.JSONDecodeError:
+        return None, None, False, f"Error: Could not parse JSON for task {task_id}. Files might be corrupted or in an unexpected format.", None, None
+    except Exception as e:
+        return None, None, False, f"An unexpected error occurred while processing task {task_id}: {e}", None, None
+
+def _write_staged(path, pieces, codec=None):
+    """
+    Writes str or bytes pieces, compressed with codec when one is given, to
+    a StagedFile for path. Returns (path, temporary path, SHA-256 hex
+    digest, size); the temporary file is removed on failure.
+    """
+    staged = StagedFile(path)
+    try:
+        writer = BlockWriter(staged, codec)
+        for piece in pieces:
+            writer.write(piece)
+        writer.close()
+    except BaseException:
+        staged.discard()
+        raise
+    return staged.close()
+
+def _export_task(task_id, workspace, conversation_dir, previous_entry=None):
+    """
+    Reads the conversation files of a single task and returns its normalized
+    message rows for --format jsonl or sqlite. Runs in a worker process when
+    --jobs is above 1. The task is skipped when its source files match
+    previous_entry from the export manifest.
+    Returns a (sources, unchanged, error, rows) tuple; on failure only error is set.
+    """
+    api_history_path = conversation_dir / "api_conversation_history.json"
+    ui_messages_path = conversation_dir / "ui_messages.json"
+
+    if not api_history_path.exists():
+        return None, False, f"Skipping task {task_id}: API history file not found at {api_history_path}", None
+    if not ui_messages_path.exists():
+        return None, False, f"Skipping task {task_id}: UI messages file not found at {ui_messages_path}", None
+
+    try:
+        source_paths = {api_history_path.name: api_history_path, ui_messages_path.name: ui_messages_path}
+        with span("extract.read", task=task_id):
+            sources, contents, unchanged = read_sources(source_paths, previous_entry)
+        if unchanged:
+            return sources, True, None, None
+
+        with span("extract.parse", task=task_id):
+            api_history = json.loads(contents.get(api_history_path.name) or api_history_path.read_bytes())
+            ui_messages = json.loads(contents.get(ui_messages_path.name) or ui_messages_path.read_bytes())
+        with span("extract.convert", task=task_id):
+            rows = message_rows(task_id, workspace, _iter_ordered_messages(api_history, ui_messages))
+        return sources, False, None, rows
+    except json.JSONDecodeError:
+        return None, False, f"Error: Could not parse JSON for task {task_id}. Files might be corrupted or in an unexpected format.", None
+    except Exception as e:
+        return None, False, f"An unexpected error occurred while processing task {task_id}: {e}", None
+
+def _run_profiled(function, *args):
+    """Calls function in a worker process and returns its result with the spans it recorded."""
+    result = function(*args)
+    return result, drain_events()
+
+def _run_chunk(function, tasks):
+    """Calls function(*task) for each of tasks in a worker process and returns the results."""
+    return [function(*task) for task in tasks]
+
+class _TaskPool:
+    """
+    Runs per-task functions in worker processes when jobs is above 1, and in
+    this process otherwise. A single pool serves every repository of a run.
+    When profiling, workers record spans on the timeline of this process and
+    send them back with each result.
+    """
+
+    def __init__(self, jobs):
+        self.jobs = jobs
+        self._profiled = is_enabled()
+        if jobs <= 1:
+            self._executor = None
+        elif self._profiled:
+            self._executor = ProcessPoolExecutor(max_workers=jobs, initializer=enable, initargs=(origin(),))
+        else:
+            self._executor = ProcessPoolExecutor(max_workers=jobs)
+
+    def map(self, function, tasks):
+        """
+        Yields function(*task) for each task. Results come in task order, so
+        output stays deterministic. Tasks are sent to the workers in chunks,
+        at most two chunks per worker ahead of the results consumed, so the
+        results waiting for the caller stay bounded however many tasks
+        there are.
+        """
+        if self._executor is None or not tasks:
+            return (function(*task) for task in tasks)
+        chunksize = max(1, min(len(tasks) // (self.jobs * 4), 4))
+        return self._map_window(function, tasks, chunksize)
+
+    def _map_window(self, function, tasks, chunksize):
+        pending = collections.deque()
+        for start in range(0, len(tasks), chunksize):
+            chunk = tasks[start:start + chunksize]
+            if self._profiled:
+                pending.append(self._executor.submit(_run_profiled, _run_chunk, function, chunk))
+            else:
+                pending.append(self._executor.submit(_run_chunk, function, chunk))
+            if len(pending) >= self.jobs * 2:
+                yield from self._chunk_results(pending.popleft())
+        while pending:
+            yield from self._chunk_results(pending.popleft())
+
+    def _chunk_results(self, future):
+        if self._profiled:
+            results, events = future.result()
+            add_events(events)
+            return results
+        return future.result()
+
+    def close(self):
+        if self._executor:
+            self._executor.shutdown()
+
+def _extract_markdown(matching_tasks, output_dir, force, pool, pipeline, store, options, errors_encountered):
+    """
+    Writes one Markdown file per task to output_dir through pipeline, or
+    part files and an index page as the chunking options require, and
+    keeps the extraction manifest and the search index up to date. Tasks are
+    recorded in order as their writes complete, while later tasks convert.
+    With a conversation store on the same file system, the files are links
+    to stored copies, and the manifest records their digests.
+    Returns the numbers of written and unchanged conversations.
+    """
+    extracted_count = 0
+    unchanged_count = 0
+    previous_manifest = {} if force else load_manifest(output_dir)
+    if store is not None:
+        if store.shares_device(output_dir):
+            store.register_root(output_dir)
+            # Outputs written before the store was used are converted once more to link them
+            previous_manifest = {task_id: entry for task_id, entry in previous_manifest.items() if entry.get('digest')}
+        else:
+            print(f"Conversation store {store.store_dir} is on another file system than {output_dir}; writing plain files.")
+            store = None
+    if store is None:
+        # Links into the store from earlier --store runs are replaced by plain files
+        previous_manifest = {task_id: entry for task_id, entry in previous_manifest.items() if not entry.get('digest')}
+    try:
+        search_index = open_search_index(output_dir)
+        indexed_tasks = indexed_task_ids(search_index)
+    except sqlite3.Error as e:
+        print(f"Warning: Could not open the search index in {output_dir}: {e}", file=sys.stderr)
+        search_index, indexed_tasks = None, set()
+    manifest = {}
+    tasks = []
+    for task_id, conversation_dir, _ in matching_tasks:
+        index_missing = search_index is not None and str(task_id) not in indexed_tasks
+        tasks.append((task_id, conversation_dir, output_dir, previous_manifest.get(str(task_id)), index_missing, options or None))
+
+    def record(task_id, output_path, sources, unchanged, rows, files, writes):
+        nonlocal search_index, extracted_count, unchanged_count
+        try:
+            statuses = [write.result() for write in writes]
+        except Exception as e:
+            errors_encountered.append(f"Error writing conversation {task_id} to {output_path}: {e}")
+            return
+        previous_entry = previous_manifest.get(str(task_id)) or {}
+        entry = {'output': output_path.name, 'sources': sources}
+        if files is None:
+            # The files of the previous run are up to date
+            entry.update((key, previous_entry[key]) for key in ('digest', 'parts') if key in previous_entry)
+        else:
+            if store is not None:
+                entry['digest'] = files[0][1]
+            if len(files) > 1:
+                entry['parts'] = [{'output': path.name, 'digest': digest} if store is not None else {'output': path.name} for path, digest in files[1:]]
+            _remove_stale_outputs(output_dir, previous_entry, entry, errors_encountered)
+        if options:
+            entry['options'] = options
+        manifest[str(task_id)] = entry
+        if search_index is not None and rows is not None:
+            try:
+                with span("extract.index", task=task_id):
+                    replace_task(search_index, str(task_id), output_path.name, rows)
+            except sqlite3.Error as e:
+                print(f"Warning: Could not update the search index in {output_dir}: {e}", file=sys.stderr)
+                search_index.close()
+                search_index = None
+        # The store reports files already linked to identical content as unchanged
+        if unchanged or (statuses and all(status == 'unchanged' for status in statuses)):
+            unchanged_count += 1
+        else:
+            extracted_count += 1
+            print(f"Extracted conversation {task_id} to {output_path}")
+
+    # (task_id, output_path, sources, unchanged, rows, [(path, digest)], write futures) in task order
+    pending = collections.deque()
+    for (task_id, *_), (output_path, sources, unchanged, error, rows, files) in zip(tasks, pool.map(_extract_task, tasks)):
+        if error:
+            errors_encountered.append(error)
+            continue
+        writes = [pipeline.submit_staged(path, temp_path, size, store=store, digest=digest) for path, temp_path, digest, size in files or ()]
+        written_files = [(path, digest) for path, _, digest, _ in files] if files is not None else None
+        pending.append((task_id, output_path, sources, unchanged, rows, written_files, writes))
+        while pending and all(write.done() for write in pending[0][-1]):
+            record(*pending.popleft())
+    while pending:
+        record(*pending.popleft())
+
+    with span("extract.manifest", output=output_dir):
+        save_manifest(output_dir, manifest)
+    if search_index is not None:
+        try:
+            # Keep the index to the tasks listed in the manifest
+            with span("extract.index_commit", output=output_dir):
+                remove_tasks(search_index, indexed_tasks - manifest.keys())
+                search_index.commit()
+        except sqlite3.Error as e:
+            print(f"Warning: Could not update the search index in {output_dir}: {e}", file=sys.stderr)
+        finally:
+            search_index.close()
+    return extracted_count, unchanged_count
+
+def _remove_stale_outputs(output_dir, previous_entry, entry, errors_encountered):
+    """
+    Removes the files listed in previous_entry that entry no longer lists:
+    part files of a conversation now split differently, and the file of a
+    conversation now written under another name, as with --compress.
+    """
+    current = {record['output'] for record in [entry, *entry.get('parts', ())]}
+    for record in [previous_entry, *previous_entry.get('parts', ())]:
+        name = record.get('output') if isinstance(record, dict) else None
+        if not isinstance(name, str) or name in current or Path(name).name != name:
+            continue
+        try:
+            (output_dir / name).unlink(missing_ok=True)
+        except OSError as e:
+            errors_encountered.append(f"Error removing outdated file {output_dir / name}: {e}")
+
+def _export_conversations(matching_tasks, export_format, export_path, force, pool, errors_encountered):
+    """
+    Streams the normalized message rows of every task to a single JSON Lines
+    or SQLite file. An export manifest next to the file records what has been
+    written, so later runs only add the rows of new or changed tasks.
+    Returns the numbers of exported and unchanged conversations.
+    """
+    exported_count = 0
+    unchanged_count = 0
+    manifest_name = export_path.name + EXPORT_MANIFEST_SUFFIX
+    previous_manifest = {} if force or not export_path.exists() else load_manifest(export_path.parent, manifest_name)
+    # Without a manifest the existing rows are unknown, so start the file over
+    truncate = not previous_manifest
+    manifest = dict(previous_manifest) # Rows of tasks not seen in this run stay in the file
+    tasks = [(task_id, workspace, conversation_dir, previous_manifest.get(str(task_id))) for task_id, conversation_dir, workspace in matching_tasks]
+
+    try:
+        export = open_export(export_format, export_path, truncate)
+    except (OSError, sqlite3.Error) as e:
+        print(f"Error: Could not open export file {export_path}: {e}", file=sys.stderr)
+        return 0, 0
+    try:
+        for (task_id, *_, previous_entry), (sources, unchanged, error, rows) in zip(tasks, pool.map(_export_task, tasks)):
+            if error:
+                errors_encountered.append(error)
+                continue
+            if unchanged:
+                unchanged_count += 1
+                manifest[str(task_id)] = dict(previous_entry, sources=sources)
+                continue
+            with span("extract.write", task=task_id):
+                written = export.write_task(task_id, rows, previous_entry)
+            manifest[str(task_id)] = {'sources': sources, 'rows': len(rows), 'rows_digest': rows_digest(rows)}
+            exported_count += 1
+            print(f"Exported {written} messages of conversation {task_id}")
+    finally:
+        export.close()
+
+    with span("extract.manifest", output=export_path):
+        save_manifest(export_path.parent, manifest, manifest_name)
+    return exported_count, unchanged_count
+
+def _group_tasks_by_workspace(global_state_file, errors_encountered):
+    """
+    Reads the task history once and groups its tasks by resolved workspace
+    path. Each distinct workspace string is resolved only once.
+    Returns ({workspace path: [(task_id, conversation_dir, workspace)]}, number
+    of history items read); groups keep the order of the history.
+    """
+    groups = {}
+    resolved_workspaces = {} # Workspace string -> resolved Path, or the error resolving it
+    task_count = 0
+    for item in _read_task_history(global_state_file, errors_encountered):
+        task_count += 1
+        # Validate essential fields in history item
+        if not isinstance(item, dict):
+            errors_encountered.append(f"Skipping invalid history item (not a dictionary): {item}")
+            continue
+
+        workspace_path_str = item.get("workspace")
+        task_id = item.get("taskId")
+
+        if not workspace_path_str:
+            errors_encountered.append(f"Skipping history item with no workspace field: {item}")
+            continue
+
+        if not task_id:
+            errors_encountered.append(f"Skipping history item with no taskId: {item}")
+            continue
+
+        try:
+            workspace_path = resolved_workspaces[workspace_path_str]
+        except (KeyError, TypeError):
+            try:
+                workspace_path = Path(workspace_path_str).resolve()
+            except Exception as e:
+                workspace_path = e
+            if isinstance(workspace_path_str, str):
+                resolved_workspaces[workspace_path_str] = workspace_path
+        if isinstance(workspace_path, Exception):
+            errors_encountered.append(f"Skipping history item with invalid workspace path '{workspace_path_str}': {workspace_path}")
+            continue
+
+        conversation_dir = global_state_file.parent / str(task_id)
+        groups.setdefault(workspace_path, []).append((task_id, conversation_dir, str(workspace_path)))
+    return groups, task_count
+
+def _markdown_options(args):
+    """
+    Collects the message window, chunking and compression options given to
+    extract-conversations, with --since and --until in milliseconds since
+    the epoch. Returns a dict without the options not given, or None after
+    printing an error.
+    """
+    options = {}
+    for option, name in (("--since", 'since'), ("--until", 'until')):
+        value = getattr(args, name, None)
+        if value is None:
+            continue
+        timestamp = normalize_timestamp(value)
+        if timestamp is None:
+            print(f"Error: Invalid {option} value '{value}'. Use an ISO 8601 date or milliseconds since the epoch.", file=sys.stderr)
+            return None
+        options[name] = timestamp
+    for name in ('last', 'chunk_messages', 'chunk_size', 'compress'):
+        if getattr(args, name, None) is not None:
+            options[name] = getattr(args, name)
+    if options and getattr(args, 'format', 'markdown') != 'markdown':
+        print("Error: --since, --until, --last, --chunk-messages, --chunk-size and --compress only apply to Markdown output.", file=sys.stderr)
+        return None
+    if not codec_available(options.get('compress')):
+        print("Error: --compress zstd requires Python 3.14 or later. Use --compress gzip or xz instead.", file=sys.stderr)
+        return None
+    return options
+
+def extract_conversations_command(args):
+    """
+    Extracts conversation history from VS Code global storage for a
+    repository, for every repository given with --repos, or for every
+    workspace in the task history with --all-workspaces. The history is read
+    once and every repository is extracted in the same pass.
+    """
+    options = _markdown_options(args)
+    if options is None:
+        return
+    all_workspaces = getattr(args, 'all_workspaces', False)
+    repo_specs = getattr(args, 'repos', None)
+    if all_workspaces:
+        print("Extracting conversations for every workspace in the task history")
+    elif repo_specs:
+        target_repo_paths = resolve_repo_paths(repo_specs)
+        if not target_repo_paths:
+            print("Error: No repositories to extract conversations for.", file=sys.stderr)
+            return
+        print(f"Extracting conversations for {len(target_repo_paths)} repositories")
+    else:
+        target_repo_paths = [Path(args.target_repo_path).resolve()]
+        print(f"Extracting conversations for repository: {target_repo_paths[0]}")
+
+    with span("discovery.global_state"):
+        found_global_state_file = find_global_state_file()
+
+    if not found_global_state_file:
+        print("Error: Could not find the global state file containing task history in known VS Code storage locations.", file=sys.stderr)
+        return
+
+    errors_encountered = []
+    with span("extract.history", file=found_global_state_file):
+        groups, task_count = _group_tasks_by_workspace(found_global_state_file, errors_encountered)
+    if all_workspaces:
+        target_repo_paths = []
+        for workspace_path in groups:
+            if workspace_path.is_dir():
+                target_repo_paths.append(workspace_path)
+            else:
+                errors_encountered.append(f"Skipping workspace {workspace_path}: directory not found")
+
+    export_format = getattr(args, 'format', 'markdown')
+    shared_output = getattr(args, 'output', None) if export_format != 'markdown' else None
+    task_total = sum(len(groups.get(repo_path, ())) for repo_path in target_repo_paths)
+    jobs = max(1, min(args.jobs or 1, task_total))
+    if jobs > 1:
+        print(f"Converting {task_total} conversations with {jobs} worker processes.")
+
+    # (destination, written, unchanged) per output
+    outputs = []
+    pool = _TaskPool(jobs)
+    # Markdown files are written by a shared pipeline; exports go to a single file
+    pipeline = OutputPipeline() if export_format == 'markdown' and not shared_output else None
+    store = ConversationStore() if getattr(args, 'store', False) else None
+    try:
+        if shared_output:
+            # One export file for every repository; rows carry their workspace
+            destination = Path(shared_output).resolve()
+            matching_tasks = [task for repo_path in target_repo_paths for task in groups.get(repo_path, ())]
+            try:
+                destination.parent.mkdir(parents=True, exist_ok=True)
+                outputs.append((destination, *_export_conversations(matching_tasks, export_format, destination, args.force, pool, errors_encountered)))
+            except OSError as e:
+                print(f"Error: Could not create output directory {destination.parent}: {e}", file=sys.stderr)
+        else:
+            for repo_path in target_repo_paths:
+                output_dir = repo_path / ".roo-conf" / "conversations"
+                try:
+                    output_dir.mkdir(parents=True, exist_ok=True)
+                except Exception as e:
+                    print(f"Error: Could not create output directory {output_dir}: {e}", file=sys.stderr)
+                    continue
+                matching_tasks = groups.get(repo_path, [])
+                with span("extract.repo", repo=repo_path, tasks=len(matching_tasks)):
+                    if export_format == 'markdown':
+                        outputs.append((output_dir, *_extract_markdown(matching_tasks, output_dir, args.force, pool, pipeline, store, options, errors_encountered)))
+                    else:
+                        destination = output_dir / f"messages.{export_format}"
+                        outputs.append((destination, *_export_conversations(matching_tasks, export_format, destination, args.force, pool, errors_encountered)))
+    finally:
+        pool.close()
+        if pipeline is not None:
+            pipeline.close()
+
+    extracted_count = sum(written for _, written, _ in outputs)
+    unchanged_count = sum(unchanged for _, _, unchanged in outputs)
+    print(f"\nFinished extracting conversations.")
+    print(f"Task history items read from global state: {task_count}")
+    if all_workspaces or repo_specs:
+        for destination, written, unchanged in outputs:
+            print(f"  {destination}: written {written}, unchanged and skipped {unchanged}")
+        print(f"Repositories: {len(target_repo_paths)}")
+        print(f"Total conversations found for repositories: {extracted_count + unchanged_count}")
+        print(f"Conversations written: {extracted_count}, unchanged and skipped: {unchanged_count}")
+    elif outputs:
+        print(f"Total conversations found for repository: {extracted_count + unchanged_count}")
+        print(f"Conversations written: {extracted_count}, unchanged and skipped: {unchanged_count}")
+        print(f"Extracted conversations saved to: {outputs[0][0]}")
+    if pipeline is not None:
+        print(pipeline.summary())
+
+
+    if errors_encountered:
+        print("\nErrors encountered during extraction:", file=sys.stderr)
+        for error in errors_encountered:
+            print(f"- {error}", file=sys.stderr)
+
+
+def _interleave_messages(api_history, ui_messages):
+    """Yields (source, timestamp, content) tuples, alternating user and assistant messages by index."""
+    for i in range(max(len(api_history), len(ui_messages))):
+        if i < len(ui_messages):
+            yield "user", ui_messages[i].get("timestamp"), ui_messages[i].get("message")
+        if i < len(api_history):
+            yield "assistant", api_history[i].get("timestamp"), api_history[i].get("content")
+
+
+def _is_sorted(timestamps):
+    return all(a <= b for a, b in itertools.pairwise(timestamps))
+
+
+def _iter_ordered_messages(api_history, ui_messages):
+    """
+    Yields (source, timestamp, content) tuples for the combined conversation,
+    ordered by timestamp when every message has one. User messages come first
+    on equal timestamps. Streams that are already sorted, which is the normal
+    case, are merged lazily instead of being combined and sorted.
+    """
+    user_messages = [("user", msg.get("timestamp"), msg.get("message")) for msg in ui_messages]
+    assistant_messages = [("assistant", msg.get("timestamp"), msg.get("content")) for msg in api_history]
+
+    if any(msg[1] is None for msg in user_messages) or any(msg[1] is None for msg in assistant_messages):
+        # Fallback to interleaving if timestamps are missing or inconsistent
+        print("Warning: Timestamps missing or inconsistent, falling back to interleaving messages by index.", file=sys.stderr)
+        return _interleave_messages(api_history, ui_messages)
+
+    # Assuming timestamp is in a sortable format (e.g., ISO 8601 string or number)
+    timestamp_key = operator.itemgetter(1)
+    try:
+        user_timestamps = [msg[1] for msg in user_messages]
+        assistant_timestamps = [msg[1] for msg in assistant_messages]
+        if _is_sorted(user_timestamps) and _is_sorted(assistant_timestamps):
+            if user_messages and assistant_messages:
+                # Check the streams are comparable with each other before merging lazily
+                user_timestamps[0] <= assistant_timestamps[0]
+            return heapq.merge(user_messages, assistant_messages, key=timestamp_key)
+        return iter(sorted(user_messages + assistant_messages, key=timestamp_key))
+    except Exception as e:
+        print(f"Error sorting messages by timestamp: {e}. Falling back to interleaving.", file=sys.stderr)
+        return _interleave_messages(api_history, ui_messages)
+
+
+def _timestamp_ordered(messages):
+    """Checks every message has a numeric timestamp and they are in ascending order."""
+    timestamps = [msg.get("timestamp") for msg in messages]
+    return all(isinstance(t, (int, float)) and not isinstance(t, bool) for t in timestamps) and _is_sorted(timestamps)
+
+
+def _window(messages, since, until):
+    """
+    Returns the messages timestamped between since and until, in
+    milliseconds since the epoch, inclusive. Messages in timestamp order
+    are cut by bisection, so those outside the window are never looked at
+    again; otherwise every timestamp is checked.
+    """
+    if _timestamp_ordered(messages):
+        timestamp_key = operator.methodcaller('get', "timestamp")
+        start = 0 if since is None else bisect.bisect_left(messages, since, key=timestamp_key)
+        stop = len(messages) if until is None else bisect.bisect_right(messages, until, key=timestamp_key)
+        return messages[start:stop]
+    window = []
+    for msg in messages:
+        timestamp = normalize_timestamp(msg.get("timestamp"))
+        if timestamp is not None and (since is None or timestamp >= since) and (until is None or timestamp <= until):
+            window.append(msg)
+    return window
+
+
+def _select_messages(api_history, ui_messages, since=None, until=None, last=None):
+    """
+    Yields the (source, timestamp, content) tuples of the combined
+    conversation, as _iter_ordered_messages, limited to the messages between
+    since and until (milliseconds since the epoch) and of those to the last
+    `last`. The message lists are sliced before the messages are combined,
+    so skipped messages are neither converted nor rendered.
+    """
+    if since is not None or until is not None:
+        api_history = _window(api_history, since, until)
+        ui_messages = _window(ui_messages, since, until)
+    if last is None:
+        return _iter_ordered_messages(api_history, ui_messages)
+    if last < 1:
+        return iter(())
+    if _timestamp_ordered(api_history) and _timestamp_ordered(ui_messages):
+        # The tail of two merged ordered streams is made of the tails of both
+        api_history = api_history[-last:]
+        ui_messages = ui_messages[-last:]
+    return iter(collections.deque(_iter_ordered_messages(api_history, ui_messages), maxlen=last))
+
+
+def _render_messages(messages):
+    # Assuming a simple turn structure where API history and UI messages correspond
+    # This might need refinement based on actual data structure
+    for source, timestamp, content in messages:
+        role = "User" if source == "user" else "Assistant"
+        yield f"## {role} ({timestamp})\n\n"
+        yield f"{content}\n\n"
+
+
+def _render_markdown(messages):
+    yield "# Conversation\n\n"
+    yield from _render_messages(messages)
+
+
+def _open_part(path, number, links, codec=None):
+    """Starts a StagedFile for part number of a split conversation, with its heading and links written."""
+    staged = StagedFile(path)
+    try:
+        writer = BlockWriter(staged, codec)
+        writer.write(f"# Conversation, part {number}\n\n{' | '.join(links)}\n\n")
+    except BaseException:
+        staged.discard()
+        raise
+    return staged, writer
+
+
+def _write_chunked(output_path, messages, max_messages=None, max_bytes=None, suffix="", codec=None):
+    """
+    Writes a conversation for output_path as _write_staged does. When it
+    does not fit into one part of at most max_messages messages and
+    max_bytes bytes, the parts go to numbered files next to output_path,
+    each streamed to disk as it fills, and output_path becomes an index page
+    listing them, written last; a message larger than max_bytes gets a part
+    of its own. Parts link to the index and the previous part at the top
+    and to the next part at the bottom. Only the first part is held in
+    memory, until it is known whether the conversation is split. suffix is
+    appended to every file name, and codec compresses every file.
+    Returns a list of (path, temporary path, SHA-256 hex digest, size),
+    output_path first.
+    """
+    output_path = output_path.with_name(output_path.name + suffix)
+    stem = output_path.name.removesuffix(".md" + suffix)
+    index_link = f"[Index]({output_path.name})"
+
+    def part_path(number):
+        return output_path.with_name(f"{stem}.part-{number:04d}.md{suffix}")
+
+    files = []
+    # (message count, first timestamp, last timestamp) of each finished part
+    parts = []
+    first_part = []
+    staged = writer = None
+    count = size = 0
+    first_timestamp = last_timestamp = None
+    try:
+        for message in messages:
+            rendered = "".join(_render_messages((message,))).encode('utf-8')
+            if count and ((max_messages and count >= max_messages) or (max_bytes and size + len(rendered) > max_bytes)):
+                parts.append((count, first_timestamp, last_timestamp))
+                number = len(parts)
+                if staged is None:
+                    # The conversation is split; write out the first part
+                    staged, writer = _open_part(part_path(1), 1, [index_link], codec)
+                    for piece in first_part:
+                        writer.write(piece)
+                    first_part = None
+                writer.write(f"{index_link} | [Next]({part_path(number + 1).name})\n")
+                writer.close()
+                files.append(staged.close())
+                staged = None
+                staged, writer = _open_part(part_path(number + 1), number + 1, [index_link, f"[Previous]({part_path(number).name})"], codec)
+                count = size = 0
+            if not count:
+                first_timestamp = message[1]
+            if staged is None:
+                first_part.append(rendered)
+            else:
+                writer.write(rendered)
+            count += 1
+            size += len(rendered)
+            last_timestamp = message[1]
+
+        if staged is None:
+            return [_write_staged(output_path, [b"# Conversation\n\n", *first_part], codec)]
+        parts.append((count, first_timestamp, last_timestamp))
+        writer.close()
+        files.append(staged.close())
+        staged = None
+
+        index = [
+            "# Conversation\n\n",
+            f"{sum(part[0] for part in parts)} messages in {len(parts)} parts.\n\n",
+            "| Part | Messages | First message | Last message |\n",
+            "| --- | --- | --- | --- |\n",
+        ]
+        position = 1
+        for number, (count, first_timestamp, last_timestamp) in enumerate(parts, start=1):
+            index.append(f"| [Part {number}]({part_path(number).name}) | {position}-{position + count - 1} | {first_timestamp} | {last_timestamp} |\n")
+            position += count
+        return [_write_staged(output_path, index, codec)] + files
+    except BaseException:
+        if staged is not None:
+            staged.discard()
+        for _, temp_path, _, _ in files:
+            temp_path.unlink(missing_ok=True)
+        raise
+
+
+def iter_markdown(api_history, ui_messages, since=None, until=None, last=None):
+    """
+    Returns an iterator over the Markdown rendering of API history and UI
+    messages, produced piece by piece so it can be written straight to a file.
+    since and until (milliseconds since the epoch) and last limit the
+    rendered messages to a time window and its last messages.
+    Message ordering is resolved before the iterator is returned, so malformed
+    input fails here rather than halfway through a write.
+    """
+    return _render_markdown(_select_messages(api_history, ui_messages, since, until, last))
+
+
+def convert_to_markdown(api_history, ui_messages, since=None, until=None, last=None):
+    """Converts API history and UI messages, optionally limited as for iter_markdown, into a Markdown string."""
+    return "".join(iter_markdown(api_history, ui_messages, since, until, last))
@@ -0,0 +1,301 @@
+import json
+import mmap
+import contextlib
+import os
+import re
+import stat
+
+CHUNK_SIZE = 64 * 1024
+TASK_HISTORY_KEY = "taskHistory"
+_TASK_HISTORY_NEEDLE = json.dumps(TASK_HISTORY_KEY).encode('utf-8')
+
+_WHITESPACE = " \t\n\r"
+_STRING_BODY = re.compile(r'[^"\\]*')
+_STRUCTURAL = re.compile(r'[^"{}\[\]]*')
+_SCALAR = re.compile(r'[^,\]}\s]*')
+# Byte-level scanning for has_task_history
+_LEADING_OBJECT = re.compile(rb'[ \t\n\r]*\{')
+_BYTE_STRUCTURAL = re.compile(rb'["{}\[\]]')
+_BYTE_COLON = re.compile(rb'[ \t\n\r]*:')
+
+
+class _JsonStream:
+    """
+    Minimal pull scanner over a JSON text file.
+    The file is read in chunks of chunk_size characters and consumed text is
+    discarded, so memory stays bounded by the chunk size plus the largest
+    value that is kept.
+    """
+
+    def __init__(self, f, chunk_size=CHUNK_SIZE):
+        self._f = f
+        self._chunk_size = chunk_size
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self):
+        """Reads the next chunk into the buffer. Returns False at end of file."""
+        if self._eof:
+            return False
+        chunk = self._f.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def error(self, message):
+        return json.JSONDecodeError(message, self._buf, self._pos)
+
+    def peek(self):
+        """Returns the next non-whitespace character without consuming it, or '' at end of file."""
+        while True:
+            buf = self._buf
+            while self._pos < len(buf) and buf[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(buf):
+                return buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def advance(self):
+        """Consumes the character returned by the last peek()."""
+        self._pos += 1
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise self.error(f"Expecting '{char}'")
+        self.advance()
+
+    def scan_value(self, keep):
+        """
+        Consumes one complete JSON value at the cursor without decoding it.
+        Returns its raw text if keep is True, otherwise an empty string.
+        """
+        first = self.peek()
+        if not first:
+            raise self.error("Expecting value")
+        if first not in '"{[':
+            return self._scan_scalar(keep)
+
+        parts = []
+        depth = 0
+        in_string = False
+        while True:
+            buf = self._buf
+            pos = start = self._pos
+            end = len(buf)
+            while pos < end:
+                if in_string:
+                    pos = _STRING_BODY.match(buf, pos).end()
+                    if pos >= end:
+                        break
+                    if buf[pos] == "\\":
+                        if pos + 1 >= end:
+                            break # Escape split across chunks, wait for more input
+                        pos += 2
+                        continue
+                    in_string = False
+                    pos += 1
+                else:
+                    pos = _STRUCTURAL.match(buf, pos).end()
+                    if pos >= end:
+                        break
+                    char = buf[pos]
+                    pos += 1
+                    if char == '"':
+                        in_string = True
+                        continue
+                    depth += 1 if char in "{[" else -1
+
+                if depth == 0 and not in_string:
+                    self._pos = pos
+                    if keep:
+                        parts.append(buf[start:pos])
+                    return "".join(parts)
+
+            if keep:
+                parts.append(buf[start:pos])
+            self._pos = pos
+            if not self._fill():
+                raise self.error("Unterminated value")
+
+    def _scan_scalar(self, keep):
+        parts = []
+        while True:
+            buf = self._buf
+            start = self._pos
+            pos = _SCALAR.match(buf, start).end()
+            if keep:
+                parts.append(buf[start:pos])
+            self._pos = pos
+            if pos < len(buf) or not self._fill():
+                return "".join(parts)
+
+
+def _seek_top_level_key(stream, key):
+    """
+    Advances the stream to the value of the given key in the top-level object.
+    Returns False as soon as it is known that the key is not present.
+    """
+    if stream.peek() != "{":
+        return False
+    stream.advance()
+    if stream.peek() == "}":
+        return False
+
+    while True:
+        if stream.peek() != '"':
+            raise stream.error("Expecting property name enclosed in double quotes")
+        name = json.loads(stream.scan_value(keep=True))
+        stream.expect(":")
+        if name == key:
+            return True
+        stream.scan_value(keep=False)
+
+        separator = stream.peek()
+        if separator == ",":
+            stream.advance()
+        elif separator == "}":
+            return False
+        else:
+            raise stream.error("Expecting ',' delimiter")
+
+
+@contextlib.contextmanager
+def _mapped_file(f):
+    """
+    Memory-maps the open binary file f read-only. Yields None for files that
+    cannot be mapped (empty files, pipes), which callers then read instead.
+    """
+    file_stat = os.fstat(f.fileno())
+    mapped = None
+    if stat.S_ISREG(file_stat.st_mode) and file_stat.st_size > 0:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            pass
+    try:
+        yield mapped
+    finally:
+        if mapped is not None:
+            mapped.close()
+
+
+def _file_contains(path, needle, chunk_size=CHUNK_SIZE):
+    """
+    Searches the raw bytes of the file at path for needle, stopping at the
+    first match. The file is memory-mapped so only the pages up to the match
+    are touched; files that cannot be mapped are read in bounded chunks.
+    """
+    with open(path, 'rb') as f, _mapped_file(f) as mapped:
+        if mapped is not None:
+            return mapped.find(needle) != -1
+
+        overlap = len(needle) - 1
+        tail = b""
+        while chunk := f.read(chunk_size):
+            window = tail + chunk
+            if needle in window:
+                return True
+            tail = window[-overlap:] if overlap else b""
+        return False
+
+
+def may_have_task_history(path):
+    """
+    Cheap pre-check for discovery: whether the file at path contains the bytes
+    "taskHistory" anywhere. Files without them cannot hold the task history and
+    are rejected without decoding; a match still needs has_task_history().
+    """
+    return _file_contains(path, _TASK_HISTORY_NEEDLE)
+
+
+def _byte_string_end(data, start):
+    """Returns the offset just past the JSON string starting at data[start], or -1 if it is unterminated."""
+    position = start + 1
+    while True:
+        quote = data.find(b'"', position)
+        if quote == -1:
+            return -1
+        backslashes = 0
+        while data[quote - 1 - backslashes] == 0x5C: # '\\'
+            backslashes += 1
+        if backslashes % 2 == 0:
+            return quote + 1
+        position = quote + 1
+
+
+def _has_top_level_key(data, needle):
+    """
+    Byte-level counterpart of _seek_top_level_key over a bytes-like object.
+    Only strings and brackets are visited, and strings are skipped with
+    find(), so large values cost no decoding. needle is the JSON-encoded key;
+    keys written with escape sequences are not recognized.
+    """
+    match = _LEADING_OBJECT.match(data)
+    if not match:
+        return False
+    depth = 1
+    position = match.end()
+    while token := _BYTE_STRUCTURAL.search(data, position):
+        start = token.start()
+        first = data[start]
+        if first == 0x22: # '"'
+            position = _byte_string_end(data, start)
+            if position == -1:
+                return False
+            if (depth == 1 and position - start == len(needle)
+                    and data[start:position] == needle and _BYTE_COLON.match(data, position)):
+                return True
+            continue
+        if first in (0x7B, 0x5B): # '{' or '['
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return False
+        position = start + 1
+    return False
+
+
+def has_task_history(path, chunk_size=CHUNK_SIZE):
+    """
+    Checks whether the JSON file at path has a top-level "taskHistory" key.
+    Stops reading as soon as the key is found or the top-level object ends.
+    Regular files are scanned as memory-mapped bytes; others are decoded in chunks.
+    """
+    with open(path, 'rb') as f, _mapped_file(f) as mapped:
+        if mapped is not None:
+            return _has_top_level_key(mapped, _TASK_HISTORY_NEEDLE)
+    with open(path, 'r', encoding='utf-8') as f:
+        return _seek_top_level_key(_JsonStream(f, chunk_size), TASK_HISTORY_KEY)
+
+
+def iter_task_history(path, chunk_size=CHUNK_SIZE):
+    """
+    Yields the entries of the "taskHistory" array in the global state file
+    at path one at a time, without loading the whole file into memory.
+    Yields nothing if the key is missing.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        stream = _JsonStream(f, chunk_size)
+        if not _seek_top_level_key(stream, TASK_HISTORY_KEY):
+            return
+
+        stream.expect("[")
+        if stream.peek() == "]":
+            return
+
+        while True:
+            yield json.loads(stream.scan_value(keep=True))
+
+            separator = stream.peek()
+            if separator == ",":
+                stream.advance()
+            elif separator == "]":
+                return
+            else:
+                raise stream.error("Expecting ',' delimiter")
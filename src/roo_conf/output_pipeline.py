@@ -0,0 +1,211 @@
+import os
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .profiling import span
+
+
+def default_write_workers():
+    return min(32, (os.cpu_count() or 1) + 4)
+
+
+class StagedFile:
+    """
+    A temporary file next to path that output is streamed into and hashed
+    as it is written, to be moved into place by OutputPipeline.submit_staged.
+    Worker processes write their output this way instead of sending it to
+    the caller. Call close() when done, or discard() to remove the file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.temp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        self.size = 0
+        self._hash = hashlib.sha256()
+        self._file = open(self.temp_path, 'wb')
+
+    def write(self, data):
+        self._file.write(data)
+        self._hash.update(data)
+        self.size += len(data)
+
+    def close(self):
+        """Closes the file. Returns (path, temporary path, SHA-256 hex digest, size)."""
+        self._file.close()
+        return self.path, self.temp_path, self._hash.hexdigest(), self.size
+
+    def discard(self):
+        self._file.close()
+        try:
+            self.temp_path.unlink()
+        except OSError:
+            pass
+
+
+class OutputPipeline:
+    """
+    Writes output files on a bounded pool of threads, so the latency of
+    each write, which dominates on network home directories and mounted
+    drives, overlaps with other writes and with the caller's work.
+    At most max_pending writes are queued at a time; submit() blocks
+    beyond that, so rendered data waiting to be written stays bounded.
+    Every file is written to a temporary file next to it and renamed into
+    place, so readers never see a partial file. Directories are created
+    once per pipeline.
+    """
+
+    def __init__(self, max_workers=None, max_pending=None):
+        max_workers = max_workers or default_write_workers()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="roo-conf-writer")
+        self._pending = threading.BoundedSemaphore(max_pending or max_workers * 4)
+        self._lock = threading.Lock()
+        self._directories = set()
+        self._start_time = time.perf_counter()
+        self._elapsed = None
+        self.files_written = 0
+        self.files_linked = 0
+        self.bytes_written = 0
+
+    def ensure_directories(self, directories):
+        """Creates directories, with their parents, skipping those this pipeline already created."""
+        for directory in directories:
+            if directory in self._directories:
+                continue
+            directory.mkdir(parents=True, exist_ok=True)
+            with self._lock:
+                self._directories.add(directory)
+                self._directories.update(directory.parents)
+
+    def submit(self, path, data, skip_unchanged=False):
+        """
+        Queues data (str or bytes-like) to be written to path. With
+        skip_unchanged, a file already holding exactly that content is left
+        alone; it is only read when its size matches.
+        Returns a future for 'created', 'updated' or 'unchanged', which
+        raises OSError when the write fails.
+        """
+        return self._submit(self._write_span, path, data, skip_unchanged)
+
+    def submit_staged(self, path, temp_path, size, store=None, digest=None):
+        """
+        Queues a file of size bytes already written to temp_path next to
+        path (see StagedFile) to be renamed into place, so no data passes
+        through this process. With a store (see conversation_store), the
+        file is stored under its SHA-256 hex digest and path is linked to
+        the stored copy instead. temp_path is consumed either way.
+        Returns a future like submit().
+        """
+        return self._submit(self._commit_span, path, temp_path, size, store, digest)
+
+    def _submit(self, function, *args):
+        self._pending.acquire()
+        try:
+            future = self._executor.submit(function, *args)
+        except BaseException:
+            self._pending.release()
+            raise
+        future.add_done_callback(lambda _: self._pending.release())
+        return future
+
+    def write(self, path, data, skip_unchanged=False):
+        """Writes data to path through the pipeline and waits for the result."""
+        return self.submit(path, data, skip_unchanged).result()
+
+    def _write_span(self, path, data, skip_unchanged):
+        with span("output.write", file=path.name):
+            return self._write(path, data, skip_unchanged)
+
+    def _commit_span(self, path, temp_path, size, store, digest):
+        with span("output.write", file=path.name):
+            if store is not None:
+                return self._commit_stored(path, temp_path, store, digest)
+            return self._commit(path, temp_path, size)
+
+    def _commit_stored(self, path, temp_path, store, digest):
+        status, written = store.adopt(path, temp_path, digest)
+        if status != 'unchanged':
+            with self._lock:
+                self.files_written += 1
+                self.bytes_written += written
+                if not written:
+                    self.files_linked += 1
+        return status
+
+    def _commit(self, path, temp_path, size):
+        try:
+            try:
+                target_stat = path.stat()
+            except FileNotFoundError:
+                target_stat = None
+            # A file with other hardlinks is a read-only link into the
+            # conversation store; its mode is not the one this file should keep
+            if target_stat is not None and target_stat.st_nlink == 1:
+                os.chmod(temp_path, target_stat.st_mode & 0o7777)
+            os.replace(temp_path, path.resolve() if path.is_symlink() else path)
+        except BaseException:
+            try:
+                temp_path.unlink()
+            except OSError:
+                pass
+            raise
+
+        with self._lock:
+            self.files_written += 1
+            self.bytes_written += size
+        return 'created' if target_stat is None else 'updated'
+
+    def _write(self, path, data, skip_unchanged):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        try:
+            target_stat = path.stat()
+        except FileNotFoundError:
+            target_stat = None
+
+        if target_stat is not None and skip_unchanged and target_stat.st_size == len(data) and path.read_bytes() == data:
+            return 'unchanged'
+
+        if path.is_symlink():
+            path = path.resolve() # Update the file the link points to, not the link
+        self.ensure_directories([path.parent])
+        temp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+            if target_stat is not None:
+                os.chmod(temp_path, target_stat.st_mode & 0o7777)
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                temp_path.unlink()
+            except OSError:
+                pass
+            raise
+
+        with self._lock:
+            self.files_written += 1
+            self.bytes_written += len(data)
+        return 'created' if target_stat is None else 'updated'
+
+    def close(self):
+        """Waits for the queued writes to finish and stops the threads."""
+        self._executor.shutdown(wait=True)
+        if self._elapsed is None:
+            self._elapsed = time.perf_counter() - self._start_time
+
+    def summary(self):
+        """Returns a line reporting the files and bytes written and the aggregate throughput."""
+        elapsed = self._elapsed if self._elapsed is not None else time.perf_counter() - self._start_time
+        mebibytes = self.bytes_written / (1024 * 1024)
+        rate = mebibytes / elapsed if elapsed > 0 else 0
+        linked = f", {self.files_linked} of them linked to copies already stored" if self.files_linked else ""
+        return f"Wrote {self.files_written} files ({mebibytes:.2f} MiB){linked} in {elapsed:.2f}s, {rate:.1f} MiB/s."
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
@@ -0,0 +1,5 @@
+import pathlib
+
+CONFIG_DIR = pathlib.Path("~/.config/roo-conf").expanduser()
+CONFIG_FILE = CONFIG_DIR / "config.json"
+TEMPLATES_DIR = CONFIG_DIR / "templates" # This is the directory for remote templates
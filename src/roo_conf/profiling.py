@@ -0,0 +1,188 @@
+import os
+import sys
+import json
+import time
+import _thread
+import contextlib
+
+# Setting ROO_CONF_PROFILE enables profiling like --profile. A value other
+# than "1" is taken as the trace file to write. ROO_CONF_CPROFILE names a
+# file to receive a cProfile dump, like --cprofile.
+PROFILE_ENV_VAR = "ROO_CONF_PROFILE"
+CPROFILE_ENV_VAR = "ROO_CONF_CPROFILE"
+DEFAULT_TRACE_FILE = "roo-conf-trace.json"
+
+_NULL_SPAN = contextlib.nullcontext()
+
+_enabled = False
+_origin_ns = 0
+# Finished spans as (name, start_ns, end_ns, pid, thread id, attributes)
+_events = []
+
+
+class _Span:
+    __slots__ = ('name', 'attributes', 'start_ns')
+
+    def __init__(self, name, attributes):
+        self.name = name
+        self.attributes = attributes
+
+    def __enter__(self):
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        _events.append((self.name, self.start_ns, time.perf_counter_ns(), os.getpid(), _thread.get_native_id(), self.attributes))
+        return False
+
+
+def span(name, **attributes):
+    """
+    Returns a context manager timing the enclosed block as the span name,
+    with attributes recorded alongside it. When profiling is disabled this
+    is a shared no-op context, so spans can stay in hot paths.
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name, attributes)
+
+
+def is_enabled():
+    return _enabled
+
+
+def origin():
+    """Returns the perf_counter_ns value that trace timestamps are relative to."""
+    return _origin_ns
+
+
+def enable(origin_ns=None):
+    """
+    Starts recording spans in this process. Worker processes are enabled
+    with the origin of the main process, so all their spans share one
+    timeline; spans inherited from a forked parent are dropped.
+    """
+    global _enabled, _origin_ns, _events
+    _enabled = True
+    _origin_ns = time.perf_counter_ns() if origin_ns is None else origin_ns
+    _events = []
+
+
+def drain_events():
+    """Removes and returns the spans recorded so far, to hand them to another process."""
+    global _events
+    events, _events = _events, []
+    return events
+
+
+def add_events(events):
+    """Adds spans recorded in another process."""
+    _events.extend(events)
+
+
+def trace_events():
+    """Returns the recorded spans as Chrome trace events, timed in microseconds."""
+    events = []
+    main_pid = os.getpid()
+    for pid in sorted({event[3] for event in _events}):
+        process_name = "roo-conf" if pid == main_pid else f"roo-conf worker {pid}"
+        events.append({'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0, 'args': {'name': process_name}})
+    for name, start_ns, end_ns, pid, tid, attributes in _events:
+        events.append({
+            'name': name,
+            'cat': name.split('.', 1)[0],
+            'ph': 'X',
+            'ts': (start_ns - _origin_ns) / 1000,
+            'dur': (end_ns - start_ns) / 1000,
+            'pid': pid,
+            'tid': tid,
+            'args': {key: str(value) for key, value in attributes.items()},
+        })
+    return events
+
+
+def write_trace(trace_path, metadata=None):
+    """
+    Writes the recorded spans to trace_path in the Chrome trace event
+    format, which chrome://tracing and Perfetto open directly.
+    """
+    trace = {'traceEvents': trace_events(), 'displayTimeUnit': 'ms', 'otherData': metadata or {}}
+    with open(trace_path, 'w', encoding='utf-8') as f:
+        json.dump(trace, f)
+
+
+def summary_lines(wall_ns):
+    """
+    Returns a table of the recorded spans aggregated by name, slowest total
+    first. Spans nest and worker spans overlap, so the share of wall time
+    of all rows can add up to more than 100%.
+    """
+    totals = {}
+    for name, start_ns, end_ns, *_ in _events:
+        count, total, longest = totals.get(name, (0, 0, 0))
+        duration = end_ns - start_ns
+        totals[name] = (count + 1, total + duration, max(longest, duration))
+
+    width = max([len("span"), *map(len, totals)])
+    lines = [f"{'span':<{width}}  {'count':>7}  {'total ms':>10}  {'mean ms':>9}  {'max ms':>9}  {'% wall':>7}"]
+    for name, (count, total, longest) in sorted(totals.items(), key=lambda item: -item[1][1]):
+        share = 100 * total / wall_ns if wall_ns else 0
+        lines.append(f"{name:<{width}}  {count:>7}  {total / 1e6:>10.1f}  {total / count / 1e6:>9.2f}  {longest / 1e6:>9.2f}  {share:>6.1f}%")
+    lines.append(f"Wall time: {wall_ns / 1e6:.1f} ms")
+    return lines
+
+
+def profile_settings(profile=False, trace_file=None, cprofile_file=None):
+    """
+    Combines the command line options with the environment variables.
+    Returns (trace_path, cprofile_path); trace_path is None when span
+    profiling is disabled.
+    """
+    trace_path = trace_file
+    environment_value = os.environ.get(PROFILE_ENV_VAR, "")
+    if trace_path is None and environment_value not in ("", "0", "1"):
+        trace_path = environment_value
+    if trace_path is None and (profile or environment_value == "1"):
+        trace_path = DEFAULT_TRACE_FILE
+    cprofile_path = cprofile_file or os.environ.get(CPROFILE_ENV_VAR) or None
+    return trace_path, cprofile_path
+
+
+@contextlib.contextmanager
+def profile_session(command, trace_path=None, cprofile_path=None):
+    """
+    Profiles the enclosed command. With trace_path, records spans, writes
+    them as a trace file and prints a summary table to stderr afterwards.
+    With cprofile_path, also runs cProfile over this process and dumps its
+    statistics there for pstats or snakeviz.
+    """
+    profiler = None
+    if cprofile_path:
+        import cProfile
+        profiler = cProfile.Profile()
+    if trace_path:
+        enable()
+    start_ns = time.perf_counter_ns()
+    try:
+        if profiler:
+            profiler.enable()
+        with span("command", command=command):
+            yield
+    finally:
+        if profiler:
+            profiler.disable()
+            try:
+                profiler.dump_stats(cprofile_path)
+                print(f"cProfile statistics written to {cprofile_path}", file=sys.stderr)
+            except OSError as e:
+                print(f"Warning: Could not write cProfile statistics to {cprofile_path}: {e}", file=sys.stderr)
+        if trace_path:
+            wall_ns = time.perf_counter_ns() - start_ns
+            print("\nProfile summary:", file=sys.stderr)
+            for line in summary_lines(wall_ns):
+                print(line, file=sys.stderr)
+            try:
+                write_trace(trace_path, {'command': command, 'argv': sys.argv[1:]})
+                print(f"Trace written to {trace_path}", file=sys.stderr)
+            except OSError as e:
+                print(f"Warning: Could not write trace file {trace_path}: {e}", file=sys.stderr)
@@ -0,0 +1,37 @@
+import os
+import glob
+import pathlib
+
+
+def resolve_repo_paths(repo_specs):
+    """
+    Expands --repos arguments into a de-duplicated list of resolved repository
+    directories, in order. Each argument may be a directory, a glob pattern,
+    or a file listing one repository path per line (blank lines and lines
+    starting with # are ignored; relative paths are relative to the file).
+    """
+    repo_dirs = []
+    seen = set()
+    for spec in repo_specs:
+        expanded = os.path.expanduser(spec)
+        if any(char in expanded for char in '*?['):
+            candidates = sorted(glob.glob(expanded, recursive=True))
+            if not candidates:
+                print(f"Warning: Pattern '{spec}' did not match any repositories.")
+        elif os.path.isfile(expanded):
+            list_dir = pathlib.Path(expanded).parent
+            with open(expanded, 'r') as f:
+                lines = [line.strip() for line in f]
+            candidates = [str(list_dir / os.path.expanduser(line)) for line in lines if line and not line.startswith('#')]
+        else:
+            candidates = [expanded]
+
+        for candidate in candidates:
+            repo_dir = pathlib.Path(candidate).resolve()
+            if not repo_dir.is_dir():
+                print(f"Warning: Skipping '{candidate}': not a directory.")
+                continue
+            if repo_dir not in seen:
+                seen.add(repo_dir)
+                repo_dirs.append(repo_dir)
+    return repo_dirs
@@ -0,0 +1,224 @@
+import sys
+import json
+import sqlite3
+import datetime
+from pathlib import Path
+
+SEARCH_INDEX_FILE_NAME = "search.sqlite"
+SEARCH_INDEX_VERSION = 1
+
+# Message metadata lives in a plain table with indexes for the filters; the
+# text lives in an FTS5 table sharing the same rowid.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id TEXT PRIMARY KEY,
+    output TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    task_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    timestamp INTEGER
+);
+CREATE INDEX IF NOT EXISTS messages_task_id ON messages (task_id);
+CREATE INDEX IF NOT EXISTS messages_timestamp ON messages (timestamp);
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5 (content);
+"""
+
+
+def message_text(content):
+    """
+    Returns the searchable text of a message. Content block lists are
+    flattened: text blocks contribute their text, tool calls their name and
+    input (so file paths passed to tools are searchable), and tool results
+    their content.
+    """
+    if content is None:
+        return ""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "\n".join(filter(None, (message_text(block) for block in content)))
+    if isinstance(content, dict):
+        if isinstance(content.get('text'), str):
+            return content['text']
+        if content.get('type') == 'tool_use':
+            return f"{content.get('name', '')} {json.dumps(content.get('input'), ensure_ascii=False)}"
+        if 'content' in content:
+            return message_text(content['content'])
+    return json.dumps(content, ensure_ascii=False, default=str)
+
+
+def normalize_timestamp(value):
+    """
+    Converts a message timestamp to milliseconds since the epoch. Numbers are
+    taken as milliseconds, as Roo stores them; strings may also be ISO 8601
+    dates, read as local time when they carry no offset. Returns None for
+    anything else.
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        value = value.strip()
+        try:
+            return int(float(value))
+        except ValueError:
+            pass
+        try:
+            return int(datetime.datetime.fromisoformat(value).timestamp() * 1000)
+        except ValueError:
+            return None
+    return None
+
+
+def collect_rows(messages, rows):
+    """
+    Passes (source, timestamp, content) messages through unchanged while
+    appending a (role, timestamp, text) index row for each to rows, so the
+    index is filled in the same pass that renders the conversation.
+    """
+    for message in messages:
+        source, timestamp, content = message
+        rows.append((source, normalize_timestamp(timestamp), message_text(content)))
+        yield message
+
+
+def open_search_index(output_dir):
+    """
+    Opens the search index in output_dir, creating it if needed. An index
+    written by a different version is discarded and recreated.
+    """
+    index_path = Path(output_dir) / SEARCH_INDEX_FILE_NAME
+    connection = sqlite3.connect(index_path)
+    version = connection.execute("PRAGMA user_version").fetchone()[0]
+    if version not in (0, SEARCH_INDEX_VERSION):
+        connection.close()
+        index_path.unlink()
+        connection = sqlite3.connect(index_path)
+    connection.execute("PRAGMA journal_mode = WAL") # Searches can run while extraction writes
+    connection.executescript(_SCHEMA)
+    connection.execute(f"PRAGMA user_version = {SEARCH_INDEX_VERSION}")
+    return connection
+
+
+def indexed_task_ids(connection):
+    return {row[0] for row in connection.execute("SELECT task_id FROM tasks")}
+
+
+def remove_tasks(connection, task_ids):
+    """Removes tasks and their messages from the index."""
+    for task_id in task_ids:
+        connection.execute("DELETE FROM messages_fts WHERE rowid IN (SELECT id FROM messages WHERE task_id = ?)", (task_id,))
+        connection.execute("DELETE FROM messages WHERE task_id = ?", (task_id,))
+        connection.execute("DELETE FROM tasks WHERE task_id = ?", (task_id,))
+
+
+def replace_task(connection, task_id, output_name, rows):
+    """Replaces the indexed messages of a task with rows of (role, timestamp, text)."""
+    remove_tasks(connection, [task_id])
+    connection.execute("INSERT INTO tasks (task_id, output) VALUES (?, ?)", (task_id, output_name))
+    # Assign the ids up front so both tables can be filled with one executemany each
+    first_id = connection.execute("SELECT coalesce(max(id), 0) + 1 FROM messages").fetchone()[0]
+    connection.executemany(
+        "INSERT INTO messages (id, task_id, position, role, timestamp) VALUES (?, ?, ?, ?, ?)",
+        ((first_id + position, task_id, position, role, timestamp) for position, (role, timestamp, _) in enumerate(rows)),
+    )
+    connection.executemany(
+        "INSERT INTO messages_fts (rowid, content) VALUES (?, ?)",
+        ((first_id + position, text) for position, (_, _, text) in enumerate(rows)),
+    )
+
+
+def _fts_query(query):
+    """Turns plain search terms into an FTS5 query matching every term, each as a phrase."""
+    return " ".join('"' + term.replace('"', '""') + '"' for term in query.split())
+
+
+def search(connection, query, task_id=None, role=None, since=None, until=None, limit=20, raw_query=False):
+    """
+    Searches indexed messages, best matches first. query holds plain terms
+    that must all match, or FTS5 query syntax when raw_query is set.
+    since and until bound the message timestamp in milliseconds, inclusive.
+    Returns a list of dicts with task_id, output, role, timestamp and snippet.
+    """
+    conditions = ["messages_fts MATCH ?"]
+    parameters = [query if raw_query else _fts_query(query)]
+    if task_id:
+        conditions.append("messages.task_id = ?")
+        parameters.append(task_id)
+    if role:
+        conditions.append("messages.role = ?")
+        parameters.append(role)
+    if since is not None:
+        conditions.append("messages.timestamp >= ?")
+        parameters.append(since)
+    if until is not None:
+        conditions.append("messages.timestamp <= ?")
+        parameters.append(until)
+    parameters.append(limit)
+
+    cursor = connection.execute(
+        "SELECT messages.task_id, tasks.output, messages.role, messages.timestamp,"
+        " snippet(messages_fts, 0, '[', ']', '...', 16)"
+        " FROM messages_fts"
+        " JOIN messages ON messages.id = messages_fts.rowid"
+        " JOIN tasks ON tasks.task_id = messages.task_id"
+        f" WHERE {' AND '.join(conditions)}"
+        " ORDER BY messages_fts.rank LIMIT ?",
+        parameters,
+    )
+    return [
+        {'task_id': task_id, 'output': output, 'role': role, 'timestamp': timestamp, 'snippet': snippet}
+        for task_id, output, role, timestamp, snippet in cursor
+    ]
+
+
+def _format_timestamp(timestamp):
+    if timestamp is None:
+        return "unknown time"
+    return datetime.datetime.fromtimestamp(timestamp / 1000).isoformat(sep=" ", timespec="seconds")
+
+
+def search_command(args):
+    """Searches the conversations extracted for a repository."""
+    output_dir = Path(args.repo).resolve() / ".roo-conf" / "conversations"
+    if not (output_dir / SEARCH_INDEX_FILE_NAME).exists():
+        print(f"Error: No search index found in {output_dir}. Run 'roo-conf extract-conversations' first.", file=sys.stderr)
+        return
+
+    since = until = None
+    for option, value in (("--since", args.since), ("--until", args.until)):
+        if value is None:
+            continue
+        timestamp = normalize_timestamp(value)
+        if timestamp is None:
+            print(f"Error: Invalid {option} value '{value}'. Use an ISO 8601 date or milliseconds since the epoch.", file=sys.stderr)
+            return
+        if option == "--since":
+            since = timestamp
+        else:
+            until = timestamp
+
+    query = " ".join(args.query)
+    connection = sqlite3.connect(output_dir / SEARCH_INDEX_FILE_NAME)
+    try:
+        results = search(
+            connection, query, task_id=args.task, role=args.role, since=since, until=until,
+            limit=args.limit, raw_query=args.fts,
+        )
+    except sqlite3.Error as e:
+        print(f"Error: Search failed: {e}", file=sys.stderr)
+        return
+    finally:
+        connection.close()
+
+    if not results:
+        print("No matches found.")
+        return
+    for result in results:
+        role = "User" if result['role'] == "user" else "Assistant"
+        print(f"{output_dir / result['output']}  task {result['task_id']}  {role} ({_format_timestamp(result['timestamp'])})")
+        print(f"    {' '.join(result['snippet'].split())}")
@@ -1,13 +1,13 @@
 import pathlib
 import platform
 import json # Need json for reading/writing config, or pass config object/setter
+from .profiling import span
 
-def find_vscode_settings_components():
+def _probe_vscode_settings_components():
     """
-    Finds potential parent directories and relative paths for custom_modes.yaml
-    for VS Code and VS Code Insiders.
+    Probes the filesystem for custom_modes.yaml under the VS Code and
+    VS Code Insiders storage directories.
     Supports POSIX systems. Structure for future Windows extension.
-    Returns a list of dictionaries, each with 'parent_path' and 'relative_path'.
     """
     home_dir = pathlib.Path.home()
     components = []
@@ -34,6 +34,17 @@ def find_vscode_settings_components():
 
     return components
 
+def find_vscode_settings_components():
+    """
+    Finds potential parent directories and relative paths for custom_modes.yaml
+    for VS Code and VS Code Insiders.
+    Both locations are probed on every call, which costs two stat calls, so a
+    file created since the last run is found.
+    Returns a list of dictionaries, each with 'parent_path' and 'relative_path'.
+    """
+    with span("discovery.settings_probe"):
+        return _probe_vscode_settings_components()
+
 def manage_vscode_settings_paths(get_config_func, set_config_func):
     """
     Finds VS Code settings paths components and stores them in the configuration
@@ -0,0 +1,171 @@
+import os
+import sys
+import json
+import pathlib
+from .paths import CONFIG_DIR
+from .global_state import has_task_history, may_have_task_history
+from .profiling import span
+
+STORAGE_INDEX_FILE = CONFIG_DIR / "storage_index.json"
+ROO_EXTENSION_ID = "rooveterinaryinc.roo-cline"
+
+# Likely names of the global state file, checked before walking the storage directories
+GLOBAL_STATE_FILE_NAMES = ("globalState.json", "global_state.json", "state.json")
+# Per-task conversation files. Directories holding them are task directories,
+# which never contain the global state file, so discovery skips them.
+CONVERSATION_FILE_NAMES = frozenset({"api_conversation_history.json", "ui_messages.json"})
+
+
+def get_roo_storage_paths():
+    """
+    Returns the known globalStorage directories of the Roo extension for
+    VS Code and VS Code Insiders across remote, Linux, macOS and Windows installs.
+    """
+    home_dir = pathlib.Path.home()
+    appdata_dir = pathlib.Path(os.getenv("APPDATA", ""))
+    return [
+        home_dir / ".vscode-server" / "data" / "User" / "globalStorage" / ROO_EXTENSION_ID,
+        home_dir / ".vscode-server-insiders" / "data" / "User" / "globalStorage" / ROO_EXTENSION_ID,
+        home_dir / ".config" / "Code" / "User" / "globalStorage" / ROO_EXTENSION_ID, # Linux path for VS Code
+        home_dir / ".config" / "Code - Insiders" / "User" / "globalStorage" / ROO_EXTENSION_ID, # Linux path for VS Code Insiders
+        home_dir / "Library" / "Application Support" / "Code" / "User" / "globalStorage" / ROO_EXTENSION_ID, # macOS path for VS Code
+        home_dir / "Library" / "Application Support" / "Code - Insiders" / "User" / "globalStorage" / ROO_EXTENSION_ID, # macOS path for VS Code Insiders
+        appdata_dir / "Code" / "User" / "globalStorage" / ROO_EXTENSION_ID, # Windows path for VS Code
+        appdata_dir / "Code - Insiders" / "User" / "globalStorage" / ROO_EXTENSION_ID, # Windows path for VS Code Insiders
+    ]
+
+
+def load_storage_index():
+    """Reads the storage discovery index. Returns an empty index if it is missing or unreadable."""
+    try:
+        with open(STORAGE_INDEX_FILE, 'r') as f:
+            index = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+    return index if isinstance(index, dict) else {}
+
+
+def update_storage_index(key, value):
+    """
+    Stores a single entry in the storage discovery index, written to a
+    temporary file and renamed into place so the index is never truncated.
+    """
+    index = load_storage_index()
+    index[key] = value
+    temp_path = STORAGE_INDEX_FILE.with_name(f".{STORAGE_INDEX_FILE.name}.{os.getpid()}.tmp")
+    try:
+        CONFIG_DIR.mkdir(parents=True, exist_ok=True)
+        try:
+            with open(temp_path, 'w') as f:
+                json.dump(index, f, indent=4)
+            os.replace(temp_path, STORAGE_INDEX_FILE)
+        except BaseException:
+            try:
+                temp_path.unlink()
+            except OSError:
+                pass
+            raise
+    except OSError as e:
+        # The index is only a cache, so failing to write it is not fatal
+        print(f"Warning: Could not write storage index {STORAGE_INDEX_FILE}: {e}", file=sys.stderr)
+
+
+def _file_record(file_path, file_stat):
+    return {
+        'path': str(file_path),
+        'mtime_ns': file_stat.st_mtime_ns,
+        'size': file_stat.st_size,
+    }
+
+
+def _cached_global_state_file():
+    """
+    Returns the indexed global state file if it is still valid, otherwise None.
+    An unchanged file is accepted on a single stat call. A file that changed
+    since it was indexed is re-checked for the "taskHistory" key.
+    """
+    record = load_storage_index().get('global_state')
+    if not isinstance(record, dict) or not record.get('path'):
+        return None
+
+    file_path = pathlib.Path(record['path'])
+    try:
+        file_stat = file_path.stat()
+    except OSError:
+        return None
+
+    if file_stat.st_mtime_ns == record.get('mtime_ns') and file_stat.st_size == record.get('size'):
+        return file_path
+
+    try:
+        if not has_task_history(file_path):
+            return None
+    except Exception:
+        return None
+    update_storage_index('global_state', _file_record(file_path, file_stat))
+    return file_path
+
+
+def _is_global_state_file(file_path):
+    """Byte-level pre-check first, so most files are rejected without being decoded."""
+    try:
+        return may_have_task_history(file_path) and has_task_history(file_path)
+    except Exception as e:
+        # Report error but continue searching
+        print(f"Error reading {file_path}: {e}", file=sys.stderr)
+        return False
+
+
+def _scan_for_global_state_file():
+    """
+    Looks for a JSON file containing "taskHistory" in the known storage paths.
+    Well-known file names are checked first; then each storage path is walked,
+    top-level files first, skipping task directories.
+    """
+    storage_paths = [storage_path for storage_path in get_roo_storage_paths() if storage_path.exists()]
+
+    checked = set()
+    for storage_path in storage_paths:
+        for name in GLOBAL_STATE_FILE_NAMES:
+            file_path = storage_path / name
+            if file_path.is_file():
+                checked.add(file_path)
+                if _is_global_state_file(file_path):
+                    print(f"Found global state file: {file_path}")
+                    return file_path
+
+    for storage_path in storage_paths:
+        print(f"Searching in: {storage_path}")
+        for root, dirs, files in os.walk(storage_path):
+            if CONVERSATION_FILE_NAMES.intersection(files):
+                dirs.clear() # A task directory
+                continue
+            dirs.sort()
+            for file in sorted(files):
+                if file.endswith(".json"):
+                    file_path = pathlib.Path(root) / file
+                    if file_path not in checked and _is_global_state_file(file_path):
+                        print(f"Found potential global state file: {file_path}")
+                        return file_path # Assume the first one found is correct
+    return None
+
+
+def find_global_state_file():
+    """
+    Locates the Roo global state file holding the task history.
+    Uses the storage index when it is still valid and rebuilds it otherwise.
+    Returns None if no global state file can be found.
+    """
+    file_path = _cached_global_state_file()
+    if file_path:
+        print(f"Using indexed global state file: {file_path}")
+        return file_path
+
+    with span("discovery.global_state_scan"):
+        file_path = _scan_for_global_state_file()
+    if file_path:
+        try:
+            update_storage_index('global_state', _file_record(file_path, file_path.stat()))
+        except OSError:
+            pass
+    return file_path
@@ -0,0 +1,208 @@
+import os
+import re
+import sys
+import mmap
+import struct
+import hashlib
+import pathlib
+import importlib.resources
+
+from .template_cache import PLACEHOLDERS
+
+# The package prompts are shipped both as files in roo_conf/prompts and as
+# one prebuilt bundle next to them, which deploy reads with a single open
+# (and mmap, when installed as files) instead of one resource call per file.
+# The wheel build generates it (see hatch_build.py); in a source tree it can
+# be built with: python -m roo_conf.template_bundle
+BUNDLE_FILE_NAME = "prompts.bundle"
+BUNDLE_MAGIC = b"RCTB"
+BUNDLE_FORMAT_VERSION = 2
+
+# Header: magic, format version, entry count, index size, SHA-256 of the data
+_HEADER = struct.Struct("<4sHHI32s")
+# Index entry: name length, data offset, data length, placeholder count,
+# SHA-256 of the file; followed by the UTF-8 name and the placeholder spans
+_ENTRY = struct.Struct("<HIIH32s")
+# Placeholder span: index into PLACEHOLDERS, start and end offsets in the file data
+_SPAN = struct.Struct("<BII")
+
+_PLACEHOLDER_BYTES_PATTERN = re.compile(b"|".join(re.escape(b"{{" + name.encode('utf-8') + b"}}") for name in PLACEHOLDERS))
+
+
+def _substitutes(name):
+    # Placeholders are only replaced in Markdown files, as for remote templates
+    return pathlib.PurePath(name).suffix == '.md'
+
+
+def build_bundle(source_dir, bundle_path):
+    """
+    Writes the files in source_dir to a bundle at bundle_path, through a
+    temporary file. Placeholder positions are found at build time and stored
+    in the index, so reading a template needs no scanning.
+    """
+    files = sorted((path for path in pathlib.Path(source_dir).iterdir() if path.is_file()), key=lambda path: path.name)
+    index = bytearray()
+    data = bytearray()
+    for path in files:
+        content = path.read_bytes()
+        spans = []
+        if _substitutes(path.name):
+            for match in _PLACEHOLDER_BYTES_PATTERN.finditer(content):
+                spans.append((PLACEHOLDERS.index(match.group()[2:-2].decode('utf-8')), match.start(), match.end()))
+        name = path.name.encode('utf-8')
+        index += _ENTRY.pack(len(name), len(data), len(content), len(spans), hashlib.sha256(content).digest())
+        index += name
+        for span in spans:
+            index += _SPAN.pack(*span)
+        data += content
+
+    header = _HEADER.pack(BUNDLE_MAGIC, BUNDLE_FORMAT_VERSION, len(files), len(index), hashlib.sha256(data).digest())
+    bundle_path = pathlib.Path(bundle_path)
+    temp_path = bundle_path.with_name(f".{bundle_path.name}.{os.getpid()}.tmp")
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(header)
+            f.write(index)
+            f.write(data)
+        os.replace(temp_path, bundle_path)
+    except OSError:
+        try:
+            temp_path.unlink()
+        except OSError:
+            pass
+        raise
+
+
+class TemplateBundle:
+    """
+    Read access to a template bundle held in memory or mapped from disk.
+    File contents are returned as memoryview slices of the bundle, so they
+    are neither copied nor decoded until a placeholder has to be replaced.
+    """
+
+    def __init__(self, buffer):
+        self._buffer = memoryview(buffer)
+        magic, format_version, count, index_size, digest = _HEADER.unpack_from(self._buffer, 0)
+        if magic != BUNDLE_MAGIC or format_version != BUNDLE_FORMAT_VERSION:
+            raise ValueError("not a template bundle of a supported version")
+        self.version = digest.hex()
+        self._entries = {}
+        position = _HEADER.size
+        data_start = _HEADER.size + index_size
+        for _ in range(count):
+            name_length, offset, length, span_count, file_digest = _ENTRY.unpack_from(self._buffer, position)
+            position += _ENTRY.size
+            name = bytes(self._buffer[position:position + name_length]).decode('utf-8')
+            position += name_length
+            spans = [_SPAN.unpack_from(self._buffer, position + i * _SPAN.size) for i in range(span_count)]
+            position += span_count * _SPAN.size
+            if data_start + offset + length > len(self._buffer):
+                raise ValueError(f"entry {name} extends past the end of the bundle")
+            self._entries[name] = (data_start + offset, length, spans, file_digest)
+
+    def names(self):
+        """Returns the file names in the bundle, sorted."""
+        return list(self._entries)
+
+    def sizes(self):
+        return {name: length for name, (_, length, _, _) in self._entries.items()}
+
+    def digests(self):
+        """Returns the SHA-256 digest of each file as it was bundled."""
+        return {name: file_digest for name, (_, _, _, file_digest) in self._entries.items()}
+
+    def read(self, name):
+        """Returns the bytes of file name as a memoryview slice of the bundle."""
+        offset, length, _, _ = self._entries[name]
+        return self._buffer[offset:offset + length]
+
+    def segments(self, name):
+        """
+        Returns the compiled segments of file name in the template_cache
+        format, or None when the file has no placeholders and can be copied
+        as is with read().
+        """
+        offset, length, spans, _ = self._entries[name]
+        if not spans:
+            return None
+        segments = []
+        position = offset
+        for placeholder, start, end in spans:
+            segments.append(str(self._buffer[position:offset + start], 'utf-8'))
+            segments.append(PLACEHOLDERS[placeholder])
+            position = offset + end
+        segments.append(str(self._buffer[position:offset + length], 'utf-8'))
+        return segments
+
+
+def _in_source_tree(package_dir):
+    """
+    Checks package_dir is roo_conf/ in a src/ layout source tree, which is
+    also where editable installs import it from.
+    """
+    return isinstance(package_dir, pathlib.Path) and package_dir.parent.name == "src" and (package_dir.parent.parent / "pyproject.toml").is_file()
+
+
+def _is_stale(bundle, prompts_dir):
+    """
+    Checks the bundle holds exactly the content of the prompt files
+    installed next to it: the same names and, per file, the same size and
+    SHA-256 digest, so a prompt edited without changing its size is caught
+    as well. Prompts inside an archive are not checked. This reads every
+    prompt, so it is only done in source trees, where prompts are edited
+    after the bundle was built by hand.
+    """
+    sizes = bundle.sizes()
+    digests = bundle.digests()
+    names = set()
+    try:
+        for item in prompts_dir.iterdir():
+            if not isinstance(item, pathlib.Path):
+                return False
+            if not item.is_file():
+                continue
+            names.add(item.name)
+            if item.name not in sizes or item.stat().st_size != sizes[item.name]:
+                return True
+            if hashlib.sha256(item.read_bytes()).digest() != digests[item.name]:
+                return True
+    except OSError:
+        return False
+    return names != sizes.keys()
+
+
+def open_bundle():
+    """
+    Opens the template bundle shipped with the package. It is memory-mapped
+    when installed as a file and read in one call from a zip archive.
+    Returns None when the bundle is missing, unreadable, of another format
+    version or, in a source tree, out of date with the prompt files, so
+    callers fall back to reading the prompts one by one. An installed
+    bundle is trusted as is: the wheel build generates it from the prompts
+    installed with it (see hatch_build.py).
+    """
+    package_dir = importlib.resources.files('roo_conf')
+    resource = package_dir / BUNDLE_FILE_NAME
+    try:
+        if isinstance(resource, pathlib.Path):
+            with open(resource, 'rb') as f:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            buffer = resource.read_bytes()
+        bundle = TemplateBundle(buffer)
+    except (OSError, ValueError, struct.error) as e:
+        if not isinstance(e, FileNotFoundError):
+            print(f"Warning: Could not read template bundle {resource}: {e}", file=sys.stderr)
+        return None
+
+    if _in_source_tree(package_dir) and _is_stale(bundle, importlib.resources.files('roo_conf.prompts')):
+        print(f"Warning: Template bundle {resource} does not match the prompt files; reading them individually.", file=sys.stderr)
+        return None
+    return bundle
+
+
+if __name__ == "__main__":
+    package_dir = pathlib.Path(__file__).resolve().parent
+    bundle_path = package_dir / BUNDLE_FILE_NAME
+    build_bundle(package_dir / "prompts", bundle_path)
+    print(f"Wrote {bundle_path} (version {open_bundle().version[:12]})")
@@ -0,0 +1,123 @@
+import os
+import re
+import sys
+import json
+from .paths import CONFIG_DIR
+
+TEMPLATE_CACHE_FILE = CONFIG_DIR / "template_cache.json"
+TEMPLATE_CACHE_VERSION = 1
+
+# Placeholders substituted at deploy time. Any other {{...}} text is left as is.
+PLACEHOLDERS = ('repo-full-path',)
+_PLACEHOLDER_PATTERN = re.compile("|".join(re.escape("{{" + name + "}}") for name in PLACEHOLDERS))
+
+
+def compile_template(content, substitute=True):
+    """
+    Splits template content at its placeholder offsets.
+    Returns a list of segments where even indices hold literal text and odd
+    indices hold placeholder names, so rendering is a single join. A template
+    without placeholders (or with substitute=False) is a single segment and
+    can be copied as is.
+    """
+    if not substitute:
+        return [content]
+
+    segments = []
+    position = 0
+    for match in _PLACEHOLDER_PATTERN.finditer(content):
+        segments.append(content[position:match.start()])
+        segments.append(match.group()[2:-2])
+        position = match.end()
+    segments.append(content[position:])
+    return segments
+
+
+def render_template(segments, values):
+    """Renders compiled segments, replacing each placeholder name with values[name]."""
+    if len(segments) == 1:
+        return segments[0] # Direct copy, nothing to substitute
+    parts = list(segments)
+    parts[1::2] = [values.get(name, "{{" + name + "}}") for name in segments[1::2]]
+    return "".join(parts)
+
+
+def load_template_cache():
+    """
+    Reads the compiled template cache. Returns a fresh cache if it is missing,
+    unreadable, or was written by a different version or placeholder set.
+    """
+    cache = {'entries': {}, 'dirty': False}
+    try:
+        with open(TEMPLATE_CACHE_FILE, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return cache
+    if (isinstance(data, dict) and data.get('version') == TEMPLATE_CACHE_VERSION
+            and data.get('placeholders') == list(PLACEHOLDERS) and isinstance(data.get('entries'), dict)):
+        cache['entries'] = data['entries']
+    return cache
+
+
+def save_template_cache(cache):
+    """Writes the compiled template cache if it changed, through a temporary file."""
+    if not cache['dirty']:
+        return
+    temp_path = TEMPLATE_CACHE_FILE.with_name(f".{TEMPLATE_CACHE_FILE.name}.{os.getpid()}.tmp")
+    try:
+        CONFIG_DIR.mkdir(parents=True, exist_ok=True)
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': TEMPLATE_CACHE_VERSION,
+                'placeholders': list(PLACEHOLDERS),
+                'entries': cache['entries'],
+            }, f)
+        os.replace(temp_path, TEMPLATE_CACHE_FILE)
+        cache['dirty'] = False
+    except OSError as e:
+        # The cache only saves work, so failing to write it is not fatal
+        print(f"Warning: Could not write template cache {TEMPLATE_CACHE_FILE}: {e}", file=sys.stderr)
+        try:
+            temp_path.unlink()
+        except OSError:
+            pass
+
+
+def prune_template_cache(cache, source_keys):
+    """
+    Drops the cached entries of templates whose key is not in source_keys,
+    so renamed and removed templates, and those of a previous template
+    source, do not stay in the cache file.
+    """
+    stale_keys = cache['entries'].keys() - source_keys
+    for source_key in stale_keys:
+        del cache['entries'][source_key]
+    if stale_keys:
+        cache['dirty'] = True
+
+
+def get_compiled_template(cache, source_key, file_stat, read_content, substitute):
+    """
+    Returns the compiled segments for the template identified by source_key.
+    The cached entry is reused when its mtime and size match file_stat;
+    otherwise read_content() is called and the result is compiled and cached.
+    Pass file_stat=None for sources that cannot be stat'ed; they are always read.
+    """
+    if file_stat is None:
+        return compile_template(read_content(), substitute)
+
+    entry = cache['entries'].get(source_key)
+    if (entry and entry.get('mtime_ns') == file_stat.st_mtime_ns and entry.get('size') == file_stat.st_size
+            and entry.get('substitute') == substitute):
+        return entry['segments']
+
+    segments = compile_template(read_content(), substitute)
+    cache['entries'][source_key] = {
+        'mtime_ns': file_stat.st_mtime_ns,
+        'size': file_stat.st_size,
+        'substitute': substitute,
+        'direct_copy': len(segments) == 1,
+        'segments': segments,
+    }
+    cache['dirty'] = True
+    return segments
@@ -0,0 +1,149 @@
+import os
+import sys
+import time
+import struct
+import select
+import pathlib
+
+# inotify event masks, from <sys/inotify.h>
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_WATCH_MASK = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+_IN_EVENT_HEADER = struct.Struct("iIII")
+
+
+class _InotifyWatcher:
+    """
+    Watches the parent directories of a set of files with Linux inotify,
+    through ctypes, so changes are seen as soon as they happen. Watching the
+    directories also catches editors that save by renaming a temporary file.
+    """
+
+    name = "inotify"
+
+    def __init__(self, paths):
+        import ctypes
+        import ctypes.util
+
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self._watched = {} # watch descriptor -> (directory, set of watched file names)
+        directories = {}
+        for path in paths:
+            directories.setdefault(str(path.parent), set()).add(path.name)
+        for directory, names in directories.items():
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), _IN_WATCH_MASK)
+            if wd < 0:
+                self.close()
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+            self._watched[wd] = (directory, names)
+
+    def wait(self, timeout):
+        """Waits up to timeout seconds (forever if None) for a change. Returns True if one happened."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            readable, _, _ = select.select([self._fd], [], [], remaining)
+            if not readable:
+                return False
+            if self._read_events():
+                return True
+
+    def _read_events(self):
+        relevant = False
+        try:
+            buffer = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return False
+        offset = 0
+        while offset < len(buffer):
+            wd, _, _, name_length = _IN_EVENT_HEADER.unpack_from(buffer, offset)
+            offset += _IN_EVENT_HEADER.size
+            name = os.fsdecode(buffer[offset:offset + name_length].rstrip(b"\0"))
+            offset += name_length
+            watched = self._watched.get(wd)
+            if watched and name in watched[1]:
+                relevant = True
+        return relevant
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class _PollingWatcher:
+    """Detects changes by comparing the mtime and size of the files at a fixed interval."""
+
+    name = "polling"
+
+    def __init__(self, paths, poll_interval):
+        self._paths = list(paths)
+        self._poll_interval = poll_interval
+        self._snapshot = self._take_snapshot()
+
+    def _take_snapshot(self):
+        snapshot = {}
+        for path in self._paths:
+            try:
+                file_stat = path.stat()
+                snapshot[path] = (file_stat.st_mtime_ns, file_stat.st_size)
+            except OSError:
+                snapshot[path] = None
+        return snapshot
+
+    def wait(self, timeout):
+        """Waits up to timeout seconds (forever if None) for a change. Returns True if one happened."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            delay = self._poll_interval
+            if deadline is not None:
+                delay = min(delay, max(0.0, deadline - time.monotonic()))
+            time.sleep(delay)
+            snapshot = self._take_snapshot()
+            if snapshot != self._snapshot:
+                self._snapshot = snapshot
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+
+    def close(self):
+        pass
+
+
+def _create_watcher(paths, poll_interval, force_polling=False):
+    """Returns an inotify watcher where available, otherwise a polling watcher."""
+    if not force_polling and sys.platform.startswith("linux"):
+        try:
+            return _InotifyWatcher(paths)
+        except (OSError, AttributeError) as e:
+            print(f"Warning: inotify is not available ({e}), falling back to polling.", file=sys.stderr)
+    return _PollingWatcher(paths, poll_interval)
+
+
+def watch_files(paths, on_change, debounce=0.2, poll_interval=0.5, force_polling=False):
+    """
+    Calls on_change() whenever one of the files in paths changes, until
+    interrupted with Ctrl+C. Bursts of changes, such as an editor saving
+    several times in a row, are debounced: on_change runs once no further
+    change has been seen for debounce seconds.
+    """
+    paths = [pathlib.Path(path) for path in paths]
+    watcher = _create_watcher(paths, poll_interval, force_polling)
+    print(f"Watching {len(paths)} file(s) for changes using {watcher.name}. Press Ctrl+C to stop.")
+    try:
+        while True:
+            if not watcher.wait(None):
+                continue
+            while watcher.wait(debounce):
+                pass # Wait for the burst of changes to settle
+            on_change()
+    except KeyboardInterrupt:
+        print("Stopped watching.")
+    finally:
+        watcher.close()
@@ -0,0 +1,118 @@
+"""
+Checks that deploy's component patterns select the same template files as
+glob.glob(recursive=True), which they replace, on a template tree with
+hidden files, nested and symlinked directories.
+
+    python -m unittest discover -s tests
+"""
+import os
+import sys
+import glob
+import pathlib
+import tempfile
+import unittest
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent / "src"))
+from roo_conf.deploy import _list_template_files, _compile_component_patterns
+
+FILES = [
+    "a.md",
+    "b.txt",
+    "x.md",
+    "].md",
+    ".hidden.md",
+    ".config/settings.md",
+    "shared/a.md",
+    "shared/c.md",
+    "shared/.secret.md",
+    "shared/nested/deep.md",
+    "shared/nested/x.md",
+    "modes/architect.md",
+    "modes/b.yaml",
+]
+
+PATTERNS = [
+    "*.md",
+    "*",
+    "**",
+    "**/*.md",
+    "**/x.md",
+    "**/*",
+    "shared/*.md",
+    "shared/**",
+    "shared/**/*.md",
+    "linked/*.md",
+    "linked/**",
+    "*/nested/*.md",
+    ".*",
+    ".*/*",
+    ".config/*",
+    "shared/.*",
+    "?.md",
+    "[ab].md",
+    "[a-c]*",
+    "[!a]*.md",
+    "[!ab]*",
+    "*/[!a]*.md",
+    "[]]*",
+    "[!]]*",
+    "[*",
+    "shared/",
+    "**/",
+    "*/",
+    "x.md",
+    "modes/b.yaml",
+]
+
+
+class ComponentPatternTest(unittest.TestCase):
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._temp_dir.cleanup)
+        self.root = pathlib.Path(self._temp_dir.name)
+        for name in FILES:
+            path = self.root / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(name)
+        # A symlinked template directory, which glob.glob follows
+        os.symlink("shared", self.root / "linked")
+
+    def _glob(self, pattern):
+        paths = glob.glob(os.path.join(glob.escape(str(self.root)), pattern), recursive=True)
+        return sorted(pathlib.Path(path).relative_to(self.root).as_posix() for path in paths if os.path.isfile(path))
+
+    def test_patterns_match_glob(self):
+        listing = _list_template_files(self.root)
+        for pattern in PATTERNS:
+            with self.subTest(pattern=pattern):
+                matcher = _compile_component_patterns([pattern])
+                self.assertEqual([file for file in listing if matcher(file)], self._glob(pattern))
+
+    def test_combined_patterns_match_union_of_globs(self):
+        listing = _list_template_files(self.root)
+        matcher = _compile_component_patterns(["shared/*.md", "[!ab]*", "**/deep.md"])
+        expected = sorted(set(self._glob("shared/*.md")) | set(self._glob("[!ab]*")) | set(self._glob("**/deep.md")))
+        self.assertEqual([file for file in listing if matcher(file)], expected)
+
+    def test_listing_follows_symlinked_directories(self):
+        listing = _list_template_files(self.root)
+        self.assertIn("linked/a.md", listing)
+        self.assertIn("linked/nested/deep.md", listing)
+        self.assertIn("shared/a.md", listing)
+
+    def test_listing_stops_at_links_to_parent_directories(self):
+        os.symlink("..", self.root / "shared" / "nested" / "up")
+        listing = _list_template_files(self.root)
+        self.assertEqual(listing, sorted(set(listing)))
+        self.assertFalse([file for file in listing if "/up/" in file])
+        self.assertIn("shared/nested/deep.md", listing)
+
+    def test_listing_skips_git_directory(self):
+        (self.root / ".git").mkdir()
+        (self.root / ".git" / "HEAD").write_text("ref: refs/heads/main\n")
+        self.assertNotIn(".git/HEAD", _list_template_files(self.root))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+"""
+Checks that incremental JSON Lines exports in roo_conf.conversation_export
+end up with the same rows as a full export, with one row per
+(task_id, position), when conversations grow, change or shrink.
+
+    python -m unittest discover -s tests
+"""
+import sys
+import json
+import pathlib
+import tempfile
+import unittest
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent / "src"))
+from roo_conf.conversation_export import JsonlExport, message_rows, rows_digest
+
+
+def _rows(task_id, contents):
+    return message_rows(task_id, "/repo", [("user", 1000 + position, content) for position, content in enumerate(contents)])
+
+
+class JsonlExportTest(unittest.TestCase):
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._temp_dir.cleanup)
+        self.path = pathlib.Path(self._temp_dir.name) / "messages.jsonl"
+
+    def _export(self, tasks, manifest, truncate=False):
+        """Exports tasks ({task_id: contents}) as a run would and returns the rows written per task and the new manifest."""
+        export = JsonlExport(self.path, truncate)
+        written = {}
+        new_manifest = dict(manifest)
+        try:
+            for task_id, contents in tasks.items():
+                rows = _rows(task_id, contents)
+                written[task_id] = export.write_task(task_id, rows, manifest.get(task_id))
+                new_manifest[task_id] = {'rows': len(rows), 'rows_digest': rows_digest(rows)}
+        finally:
+            export.close()
+        return written, new_manifest
+
+    def _read(self):
+        return [json.loads(line) for line in self.path.read_text(encoding='utf-8').splitlines()]
+
+    def _assert_matches_full_export(self, tasks):
+        rows = self._read()
+        keys = [(row['task_id'], row['position']) for row in rows]
+        self.assertEqual(len(keys), len(set(keys)))
+        expected = [row for task_id, contents in tasks.items() for row in _rows(task_id, contents)]
+        key = lambda row: (row['task_id'], row['position'])
+        self.assertEqual(sorted(rows, key=key), sorted(expected, key=key))
+
+    def test_appended_messages_are_appended(self):
+        _, manifest = self._export({"a": ["one", "two"], "b": ["x"]}, {}, truncate=True)
+        written, _ = self._export({"a": ["one", "two", "three"]}, manifest)
+        self.assertEqual(written, {"a": 1})
+        self._assert_matches_full_export({"a": ["one", "two", "three"], "b": ["x"]})
+
+    def test_changed_messages_replace_earlier_rows(self):
+        _, manifest = self._export({"a": ["one", "two"], "b": ["x", "y"], "c": ["z"]}, {}, truncate=True)
+        tasks = {"a": ["one", "edited", "three"], "b": ["x"]}
+        written, manifest = self._export(tasks, manifest)
+        self.assertEqual(written, {"a": 3, "b": 1})
+        self._assert_matches_full_export({**tasks, "c": ["z"]})
+
+        # A later append to a replaced task only adds the new message
+        written, _ = self._export({"b": ["x", "w"]}, manifest)
+        self.assertEqual(written, {"b": 1})
+        self._assert_matches_full_export({"a": ["one", "edited", "three"], "b": ["x", "w"], "c": ["z"]})
+
+    def test_emptied_conversation_leaves_no_rows(self):
+        _, manifest = self._export({"a": ["one"], "b": ["x"]}, {}, truncate=True)
+        self._export({"a": []}, manifest)
+        self._assert_matches_full_export({"b": ["x"]})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,184 @@
+"""
+Checks the slug-keyed three-way merge of custom_modes.yaml in
+roo_conf.custom_modes, which parses the files without a YAML library, so
+that no mode and no comment is lost in a sync-modes merge.
+
+    python -m unittest discover -s tests
+"""
+import sys
+import pathlib
+import unittest
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent / "src"))
+from roo_conf.custom_modes import parse_custom_modes, merge_custom_modes
+
+BASE = """\
+# Roo custom modes
+customModes:
+  # Modes shared by both installations
+  - slug: writer
+    name: Writer
+    roleDefinition: You write documentation.
+    groups:
+      - read
+  - slug: reviewer
+    name: Reviewer # inline comment
+    roleDefinition: |-
+      You review changes.
+      Example of a mode list:
+      - slug: not-a-mode
+        name: Not a mode
+      # Not a comment either
+    groups:
+      - read
+  - slug: tester
+    name: Tester
+    roleDefinition: You write tests.
+# Trailing comment
+"""
+
+
+def _edit(text, old, new):
+    assert text.count(old) == 1, old
+    return text.replace(old, new)
+
+
+def _slugs(text):
+    return [slug for slug, _ in parse_custom_modes(text)['modes']]
+
+
+class CustomModesParseTest(unittest.TestCase):
+
+    def test_round_trip_keeps_text_and_comments(self):
+        parsed = parse_custom_modes(BASE)
+        self.assertEqual([slug for slug, _ in parsed['modes']], ["writer", "reviewer", "tester"])
+        merged, conflicts = merge_custom_modes([BASE, BASE], BASE)
+        self.assertEqual(merged, BASE)
+        self.assertEqual(conflicts, [])
+
+    def test_block_scalar_containing_slug_lines(self):
+        modes = dict(parse_custom_modes(BASE)['modes'])
+        self.assertNotIn("not-a-mode", modes)
+        self.assertIn("    - slug: not-a-mode\n", modes["reviewer"])
+        self.assertIn("# Not a comment either", modes["reviewer"])
+
+    def test_zero_indent_list(self):
+        text = """\
+customModes:
+- slug: a
+  name: A
+  roleDefinition: |
+    - slug: fake
+- slug: "b"
+  name: B
+# Comment after the list
+otherKey: value
+"""
+        parsed = parse_custom_modes(text)
+        self.assertEqual(parsed['indent'], 0)
+        self.assertEqual(_slugs(text), ["a", "b"])
+        self.assertEqual(parsed['footer'], "# Comment after the list\notherKey: value\n")
+        merged, _ = merge_custom_modes([text], None)
+        self.assertEqual(merged, text)
+        edited = _edit(text, "name: B", "name: Bee")
+        self.assertEqual(merge_custom_modes([text, edited], text), (edited, []))
+
+    def test_slug_not_on_first_line(self):
+        text = "customModes:\n  -\n    name: A\n    slug: 'a'\n  - name: B\n    slug: b\n"
+        self.assertEqual(_slugs(text), ["a", "b"])
+
+    def test_empty_list(self):
+        parsed = parse_custom_modes("# header\ncustomModes: []\n")
+        self.assertEqual(parsed['modes'], [])
+        # The newer file removed every mode
+        emptied = "# Roo custom modes\ncustomModes: []\n# Trailing comment\n"
+        self.assertEqual(merge_custom_modes([emptied, BASE], BASE), (emptied, []))
+        self.assertEqual(merge_custom_modes([BASE, emptied], BASE), (emptied, []))
+
+    def test_unparseable_content(self):
+        self.assertIsNone(parse_custom_modes("modes:\n  - slug: a\n"))
+        self.assertIsNone(parse_custom_modes("customModes:\n  - slug: a\n  - slug: a\n"))
+        self.assertIsNone(parse_custom_modes("customModes:\n  - name: no slug\n"))
+        self.assertIsNone(merge_custom_modes([BASE, "customModes:\n  - name: no slug\n"], BASE))
+
+
+class CustomModesMergeTest(unittest.TestCase):
+
+    def test_edits_to_different_modes_on_both_sides(self):
+        newer = _edit(BASE, "You write documentation.", "You write user guides.")
+        older = _edit(BASE, "You write tests.", "You write unit tests.")
+        merged, conflicts = merge_custom_modes([newer, older], BASE)
+        self.assertEqual(conflicts, [])
+        self.assertEqual(merged, _edit(newer, "You write tests.", "You write unit tests."))
+
+    def test_same_mode_edited_on_both_sides(self):
+        newer = _edit(BASE, "name: Tester", "name: Newer tester")
+        older = _edit(BASE, "name: Tester", "name: Older tester")
+        merged, conflicts = merge_custom_modes([newer, older], BASE)
+        self.assertEqual(merged, newer)
+        self.assertEqual(len(conflicts), 1)
+        self.assertEqual(conflicts[0]['slug'], "tester")
+        self.assertEqual(conflicts[0]['kept'], 0)
+        self.assertEqual(conflicts[0]['removed'], [])
+        [(index, discarded)] = conflicts[0]['discarded']
+        self.assertEqual(index, 1)
+        self.assertIn("name: Older tester", discarded)
+
+    def test_same_edit_on_both_sides_is_not_a_conflict(self):
+        edited = _edit(BASE, "name: Tester", "name: QA")
+        merged, conflicts = merge_custom_modes([edited, edited], BASE)
+        self.assertEqual((merged, conflicts), (edited, []))
+
+    def test_removal_without_edit_elsewhere(self):
+        removed = _edit(BASE, "  - slug: tester\n    name: Tester\n    roleDefinition: You write tests.\n", "")
+        for texts in ([removed, BASE], [BASE, removed]):
+            merged, conflicts = merge_custom_modes(texts, BASE)
+            self.assertEqual(_slugs(merged), ["writer", "reviewer"])
+            self.assertEqual(conflicts, [])
+            self.assertTrue(merged.endswith("# Trailing comment\n"))
+
+    def test_edit_wins_over_removal(self):
+        removed = _edit(BASE, "  - slug: writer\n    name: Writer\n    roleDefinition: You write documentation.\n    groups:\n      - read\n", "")
+        edited = _edit(BASE, "name: Writer", "name: Technical writer")
+        for texts, edit_index in (([removed, edited], 1), ([edited, removed], 0)):
+            with self.subTest(newest="removal" if edit_index else "edit"):
+                merged, conflicts = merge_custom_modes(texts, BASE)
+                self.assertIn("name: Technical writer", merged)
+                self.assertEqual(_slugs(merged), ["writer", "reviewer", "tester"])
+                self.assertEqual(len(conflicts), 1)
+                self.assertEqual(conflicts[0]['kept'], edit_index)
+                self.assertEqual(conflicts[0]['removed'], [1 - edit_index])
+                self.assertEqual(conflicts[0]['discarded'], [])
+
+    def test_additions_on_both_sides(self):
+        newer = BASE.replace("# Trailing comment\n", "  - slug: planner\n    name: Planner\n# Trailing comment\n")
+        older = _edit(BASE, "  - slug: tester\n", "  - slug: debugger\n    name: Debugger\n  - slug: tester\n")
+        merged, conflicts = merge_custom_modes([newer, older], BASE)
+        self.assertEqual(conflicts, [])
+        self.assertEqual(_slugs(merged), ["writer", "reviewer", "debugger", "tester", "planner"])
+
+    def test_edit_inside_block_scalar(self):
+        newer = _edit(BASE, "      - slug: not-a-mode\n", "      - slug: still-not-a-mode\n")
+        older = _edit(BASE, "name: Writer", "name: Author")
+        merged, conflicts = merge_custom_modes([newer, older], BASE)
+        self.assertEqual(conflicts, [])
+        self.assertEqual(merged, _edit(newer, "name: Writer", "name: Author"))
+
+    def test_comments_are_preserved(self):
+        newer = _edit(BASE, "    roleDefinition: You write tests.\n", "    # Added by hand\n    roleDefinition: You write tests.\n")
+        older = _edit(BASE, "name: Writer", "name: Author")
+        merged, _ = merge_custom_modes([newer, older], BASE)
+        for comment in ("# Roo custom modes\n", "  # Modes shared by both installations\n", "# inline comment\n", "    # Added by hand\n", "# Trailing comment\n"):
+            self.assertIn(comment, merged)
+
+    def test_without_base_modes_are_combined(self):
+        first = "customModes:\n  - slug: a\n    name: A\n  - slug: b\n    name: B1\n"
+        second = "customModes:\n  - slug: b\n    name: B2\n  - slug: c\n    name: C\n"
+        merged, conflicts = merge_custom_modes([first, second], None)
+        self.assertEqual(merged, "customModes:\n  - slug: a\n    name: A\n  - slug: b\n    name: B1\n  - slug: c\n    name: C\n")
+        self.assertEqual([conflict['slug'] for conflict in conflicts], ["b"])
+        self.assertEqual(conflicts[0]['discarded'], [(1, "- slug: b\n  name: B2\n")])
+
+
+if __name__ == "__main__":
+    unittest.main()
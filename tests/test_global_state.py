@@ -0,0 +1,157 @@
+"""
+Checks the streaming global state scanner in roo_conf.global_state against
+json.loads on the same documents, read with chunk sizes small enough to
+split every token, including truncated and malformed input.
+
+    python -m unittest discover -s tests
+"""
+import io
+import sys
+import json
+import random
+import pathlib
+import tempfile
+import unittest
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent / "src"))
+from roo_conf.global_state import (
+    TASK_HISTORY_KEY, _JsonStream, _seek_top_level_key, _has_top_level_key, _TASK_HISTORY_NEEDLE,
+    has_task_history, iter_task_history,
+)
+
+CHUNK_SIZES = [1, 2, 3, 5, 16, 64 * 1024]
+
+DOCUMENTS = [
+    '{"taskHistory": [{"id": "a", "workspace": "/repo"}, {"id": "b"}]}',
+    '{"taskHistory": []}',
+    '{"taskHistory":[1,2.5,-3e2,true,false,null,"x"]}',
+    ' \n\t{ "taskHistory" :\r\n [ { "id" : "a" } ] } ',
+    '{"before": "a \\"quoted\\" \\\\ value", "taskHistory": [{"text": "say \\"hi\\"\\\\"}]}',
+    '{"before": "taskHistory", "taskHistory": [{"note": "\\"taskHistory\\": []"}]}',
+    '{"task\\"History": [0], "taskHistory": [1]}',
+    '{"task\\u0048istory": [{"id": "escaped key"}]}',
+    '{"nested": {"taskHistory": [{"id": "inner"}]}, "taskHistory": [{"id": "outer"}]}',
+    '{"nested": {"taskHistory": [{"id": "inner"}]}, "other": [{"taskHistory": []}]}',
+    '{"list": [[{"taskHistory": 1}], "]", "}", "[", "{"], "taskHistory": [{"id": "after brackets in strings"}]}',
+    '{"unicode": "\\u00e9\\ud83d\\ude00 é 😀", "taskHistory": [{"title": "café 😀 \\u2028"}]}',
+    '{"big": "' + "x" * 5000 + '", "taskHistory": [{"id": "after a long value"}]}',
+    '{"taskHistory": [{"deep": [[[{"a": [{}]}]]]}, {"empty": {}}, []]}',
+    '{}',
+    '{"other": 1}',
+    '[{"taskHistory": []}]',
+    '"taskHistory"',
+    '',
+]
+
+MALFORMED = [
+    '{"taskHistory": [1 2]}',
+    '{"taskHistory": [1,]}',
+    '{"taskHistory" [1]}',
+    '{"a" 1, "taskHistory": []}',
+    '{"a": 1 "taskHistory": []}',
+    "{'taskHistory': []}",
+    '{taskHistory: []}',
+    '{"taskHistory": [tru]}',
+    '{"taskHistory": [{"id": }]}',
+]
+
+
+def _expected(document):
+    value = json.loads(document)
+    if isinstance(value, dict):
+        return value.get(TASK_HISTORY_KEY, [])
+    return []
+
+
+class GlobalStateScannerTest(unittest.TestCase):
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._temp_dir.cleanup)
+        self.path = pathlib.Path(self._temp_dir.name) / "state.json"
+
+    def _iter(self, document, chunk_size):
+        self.path.write_text(document, encoding='utf-8')
+        return list(iter_task_history(self.path, chunk_size))
+
+    def _seek(self, document, chunk_size):
+        return _seek_top_level_key(_JsonStream(io.StringIO(document), chunk_size), TASK_HISTORY_KEY)
+
+    def test_task_history_matches_json_loads(self):
+        for document in DOCUMENTS:
+            expected = _expected(document) if document else []
+            for chunk_size in CHUNK_SIZES:
+                with self.subTest(document=document[:60], chunk_size=chunk_size):
+                    self.assertEqual(self._iter(document, chunk_size), expected)
+
+    def test_top_level_key_detection_matches_json_loads(self):
+        for document in DOCUMENTS:
+            value = json.loads(document) if document else None
+            expected = isinstance(value, dict) and TASK_HISTORY_KEY in value
+            for chunk_size in CHUNK_SIZES:
+                with self.subTest(document=document[:60], chunk_size=chunk_size):
+                    self.assertEqual(self._seek(document, chunk_size), expected)
+            if "\\u0048" not in document: # The byte scanner does not decode escaped keys
+                with self.subTest(document=document[:60], scanner="bytes"):
+                    self.assertEqual(_has_top_level_key(document.encode('utf-8'), _TASK_HISTORY_NEEDLE), expected)
+                    self.path.write_text(document, encoding='utf-8')
+                    self.assertEqual(has_task_history(self.path), expected)
+
+    def test_truncated_input_raises(self):
+        document = DOCUMENTS[4]
+        array_end = document.rindex("]") + 1
+        for cut in range(1, array_end):
+            truncated = document[:cut]
+            for chunk_size in (1, 3, 64 * 1024):
+                with self.subTest(truncated=truncated, chunk_size=chunk_size):
+                    with self.assertRaises(json.JSONDecodeError):
+                        self._iter(truncated, chunk_size)
+        # Reading stops at the end of the array, so a cut after it goes unnoticed
+        self.assertEqual(self._iter(document[:array_end], 1), _expected(document))
+
+    def test_malformed_input_raises(self):
+        for document in MALFORMED:
+            with self.assertRaises(json.JSONDecodeError):
+                json.loads(document)
+            for chunk_size in CHUNK_SIZES:
+                with self.subTest(document=document, chunk_size=chunk_size):
+                    with self.assertRaises(json.JSONDecodeError):
+                        self._iter(document, chunk_size)
+
+    def test_task_history_that_is_not_an_array_raises(self):
+        for document in ('{"taskHistory": {"id": 1}}', '{"taskHistory": "[]"}', '{"taskHistory": null}'):
+            with self.subTest(document=document):
+                with self.assertRaises(json.JSONDecodeError):
+                    self._iter(document, 2)
+
+    def test_random_documents_match_json_loads(self):
+        rng = random.Random(20261017)
+        alphabet = ['a', 'Z', ' ', '"', '\\', '/', '{', '}', '[', ']', ',', ':', '\n', 'é', '😀', ' ']
+
+        def value(depth):
+            kind = rng.randrange(6 if depth < 3 else 3)
+            if kind == 0:
+                return "".join(rng.choice(alphabet) for _ in range(rng.randrange(12)))
+            if kind == 1:
+                return rng.choice([0, -1, 2.5, 1e21, True, False, None])
+            if kind == 2:
+                return TASK_HISTORY_KEY
+            if kind == 3:
+                return [value(depth + 1) for _ in range(rng.randrange(4))]
+            keys = [rng.choice([TASK_HISTORY_KEY, "id", 'x"y', "a\\b", "é"]) for _ in range(rng.randrange(4))]
+            return {key: value(depth + 1) for key in keys}
+
+        for _ in range(200):
+            state = {key: value(1) for key in rng.sample(["a", "b", 'q"uote', "nested"], rng.randrange(4))}
+            if rng.random() < 0.8:
+                state[TASK_HISTORY_KEY] = [value(1) for _ in range(rng.randrange(5))]
+            document = json.dumps(state, ensure_ascii=rng.random() < 0.5, indent=rng.choice([None, 1, "\t"]))
+            for chunk_size in (1, 7, 64 * 1024):
+                with self.subTest(document=document[:60], chunk_size=chunk_size):
+                    self.assertEqual(self._iter(document, chunk_size), _expected(document))
+                    self.assertEqual(self._seek(document, chunk_size), TASK_HISTORY_KEY in state)
+            self.assertEqual(_has_top_level_key(document.encode('utf-8'), _TASK_HISTORY_NEEDLE), TASK_HISTORY_KEY in state)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+"""
+Enforces the CLI import-time budget from benchmarks/importtime.py: every
+budgeted invocation stays under its time limit and does not import the
+modules that must stay lazy for it.
+
+    python -m unittest discover -s tests
+"""
+import sys
+import pathlib
+import unittest
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent / "benchmarks"))
+import importtime
+
+
+class ImportTimeBudgetTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # Every invocation runs in fresh interpreters; the fastest of three runs is kept
+        cls.report, _ = importtime.check_budgets(runs=3)
+
+    def test_no_forbidden_modules_imported(self):
+        for invocation in importtime.BUDGETS:
+            with self.subTest(invocation=invocation):
+                self.assertEqual(self.report[invocation]["forbidden_imported"], [])
+
+    def test_import_time_within_budget(self):
+        for invocation, budget in importtime.BUDGETS.items():
+            with self.subTest(invocation=invocation):
+                self.assertLessEqual(self.report[invocation]["import_us"], budget["max_import_us"])
+
+
+if __name__ == "__main__":
+    unittest.main()